@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+结果归档基准测试
+对比CSV、JSONL与列式归档（.osr）的写入耗时、文件大小，以及重新加载并筛选未授权访问结果的耗时
+
+用法:
+    python -m benchmarks.bench_archive [--rows 1000000] [--out-dir result/bench]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+from modules.data_parser import DataParser
+from modules.exporter import ResultExporter
+from modules.ollama_scanner import ScanResult
+from modules.result_archive import ResultArchive
+
+
+def build_results(rows: int) -> list:
+    """构造扫描结果：每1000个目标一个未授权访问，其余为端口未开放"""
+    results = []
+    for index, (host, port) in enumerate(DataParser.parse_ip_range("10.0.0.0/8")[:rows]):
+        if index % 1000 == 0:
+            results.append(ScanResult(host, port, True, version="0.5.7", models=["llama3:8b", "qwen2:7b"]))
+        else:
+            results.append(ScanResult(host, port, False, error="端口未开放"))
+    return results
+
+
+def reload_csv(file_path: str) -> int:
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        return sum(1 for row in csv.DictReader(f) if row["vulnerable"] == "True")
+
+
+def reload_jsonl(file_path: str) -> int:
+    with open(file_path, encoding='utf-8') as f:
+        return sum(1 for line in f if json.loads(line)["vulnerable"])
+
+
+def reload_archive(file_path: str) -> int:
+    return sum(1 for _ in ResultArchive(file_path).load_results(vulnerable_only=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结果归档基准测试")
+    parser.add_argument("--rows", type=int, default=1000000, help="结果数量")
+    parser.add_argument("--out-dir", default=os.path.join("result", "bench"), help="临时文件目录")
+    args = parser.parse_args()
+    
+    os.makedirs(args.out_dir, exist_ok=True)
+    results = build_results(args.rows)
+    
+    for format_type, reload in (("csv", reload_csv), ("jsonl", reload_jsonl), ("archive", reload_archive)):
+        start = time.perf_counter()
+        with ResultExporter.open_sink(os.path.join(args.out_dir, "bench_archive"), format_type) as sink:
+            sink.write_many(results)
+        write_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        hits = reload(sink.file_path)
+        reload_seconds = time.perf_counter() - start
+        
+        print(json.dumps({
+            "format": format_type,
+            "rows": sink.count,
+            "write_seconds": round(write_seconds, 2),
+            "file_mb": round(os.path.getsize(sink.file_path) / 1024 / 1024, 2),
+            "reload_filter_seconds": round(reload_seconds, 2),
+            "hits": hits,
+        }))
+        os.remove(sink.file_path)
+    
+    # 列式读取全部行（不创建结果对象）
+    with ResultExporter.open_sink(os.path.join(args.out_dir, "bench_archive"), "archive") as sink:
+        sink.write_many(results)
+    start = time.perf_counter()
+    columns = ResultArchive(sink.file_path).read_columns(("host", "port", "vulnerable", "error"))
+    print(json.dumps({
+        "format": "archive",
+        "read_columns_rows": len(columns["host"]),
+        "read_columns_seconds": round(time.perf_counter() - start, 2),
+    }))
+    os.remove(sink.file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+目标去重基准测试
+模拟合并多份资产导出后的目标列表（每个目标重复若干次，部分带协议前缀和端口），
+对比按原始元组去重（dict.fromkeys）与 TargetIndex 规范化去重的耗时、结果数量和结果占用的内存
+
+用法:
+    python -m benchmarks.bench_dedupe [--targets 500000] [--copies 4]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from modules.data_parser import DataParser
+from modules.target_index import TargetIndex
+
+
+def make_targets(count: int, copies: int) -> list:
+    """生成重复的目标列表，每份导出中三分之一的主机写成 http://ip:port 的形式"""
+    unique = list(DataParser.parse_ip_range("10.0.0.0/8")[:count])
+    targets = []
+    for copy in range(copies):
+        for index, (host, port) in enumerate(unique):
+            if (index + copy) % 3 == 0:
+                targets.append((f"http://{host}:{port}", 11434))
+            else:
+                targets.append((host, port))
+    random.Random(0).shuffle(targets)
+    return targets
+
+
+def measure(name: str, dedupe, count: int, copies: int) -> dict:
+    """
+    第一次计时，第二次开启tracemalloc统计释放原始目标列表后去重结果仍占用的内存
+    （原始目标在统计范围内生成，结果中引用的原始字符串和元组也计算在内）
+    """
+    targets = make_targets(count, copies)
+    gc.collect()
+    start = time.perf_counter()
+    unique = len(dedupe(targets))
+    elapsed = time.perf_counter() - start
+    del targets
+    
+    gc.collect()
+    tracemalloc.start()
+    targets = make_targets(count, copies)
+    result = dedupe(targets)
+    del targets
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    
+    return {"method": name, "unique": unique, "seconds": round(elapsed, 2),
+            "retained_mb": round(retained / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="目标去重基准测试")
+    parser.add_argument("--targets", type=int, default=500000, help="不重复的目标数")
+    parser.add_argument("--copies", type=int, default=4, help="每个目标出现的次数")
+    args = parser.parse_args()
+    
+    print(json.dumps({"targets": args.targets * args.copies, "python": sys.version.split()[0]}))
+    
+    methods = (
+        # 原始元组去重无法识别 http://ip:port 与 ip 是同一目标
+        ("tuple_dict", lambda items: list(dict.fromkeys(items))),
+        ("target_index", TargetIndex.build),
+    )
+    for name, dedupe in methods:
+        print(json.dumps(measure(name, dedupe, args.targets, args.copies), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
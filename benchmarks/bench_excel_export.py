@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Excel导出基准测试
+对比旧版 _export_excel（普通工作簿逐个 sheet.cell() 写入，再遍历所有单元格计算列宽）
+与当前只写模式逐行导出的耗时和内存峰值
+
+用法:
+    python -m benchmarks.bench_excel_export [--rows 100000] [--out-dir result/bench]
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+
+from modules.data_parser import DataParser
+from modules.exporter import ResultExporter
+from modules.ollama_scanner import ScanResult
+
+
+def legacy_export_excel(results: list, file_path: str) -> bool:
+    """重构前的Excel导出实现，仅用于对比"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "扫描结果"
+    
+    fieldnames = list(results[0].keys())
+    
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    
+    for col_idx, field in enumerate(fieldnames, start=1):
+        cell = sheet.cell(row=1, column=col_idx, value=field)
+        cell.fill = header_fill
+        cell.font = header_font
+    
+    for row_idx, result in enumerate(results, start=2):
+        for col_idx, field in enumerate(fieldnames, start=1):
+            sheet.cell(row=row_idx, column=col_idx, value=result.get(field, ""))
+    
+    for column in sheet.columns:
+        max_length = 0
+        column_letter = column[0].column_letter
+        for cell in column:
+            if len(str(cell.value)) > max_length:
+                max_length = len(str(cell.value))
+        sheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
+    
+    workbook.save(file_path)
+    workbook.close()
+    return True
+
+
+def measure(name: str, export, results: list, file_path: str) -> dict:
+    """导出两次：第一次计时，第二次开启tracemalloc统计内存峰值（追踪本身会显著拖慢导出）"""
+    gc.collect()
+    start = time.perf_counter()
+    export(results, file_path)
+    elapsed = time.perf_counter() - start
+    
+    gc.collect()
+    tracemalloc.start()
+    export(results, file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "exporter": name,
+        "rows": len(results),
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(len(results) / elapsed),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "file_mb": round(os.path.getsize(file_path) / 1024 / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel导出基准测试")
+    parser.add_argument("--rows", type=int, default=100000, help="导出行数")
+    parser.add_argument("--out-dir", default=os.path.join("result", "bench"), help="临时文件目录")
+    args = parser.parse_args()
+    
+    os.makedirs(args.out_dir, exist_ok=True)
+    
+    # 每100个目标一个未授权访问，其余为端口未开放
+    results = []
+    for index, (host, port) in enumerate(DataParser.parse_ip_range("10.0.0.0/8")[:args.rows]):
+        if index % 100 == 0:
+            result = ScanResult(host, port, True, version="0.5.7", models=["llama3:8b", "qwen2:7b"])
+        else:
+            result = ScanResult(host, port, False, error="端口未开放")
+        results.append(result.to_dict())
+    
+    for name, export in (("legacy", legacy_export_excel), ("write_only", ResultExporter._export_excel)):
+        file_path = os.path.join(args.out_dir, f"bench_{name}.xlsx")
+        print(json.dumps(measure(name, export, results, file_path), ensure_ascii=False))
+        os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
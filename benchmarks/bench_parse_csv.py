@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+CSV目标解析基准测试
+对比旧版 _parse_csv（整个文件读入 DictReader 列表，逐行 replace/split）与当前流式解析的耗时和内存峰值
+
+用法:
+    python -m benchmarks.bench_parse_csv [--rows 1000000] [--out-dir result/bench]
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from modules.data_parser import DataParser
+
+
+def legacy_parse_csv(file_path: str) -> list:
+    """重构前的CSV解析实现，仅用于对比"""
+    targets = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    except UnicodeDecodeError:
+        with open(file_path, 'r', encoding='gbk') as f:
+            rows = list(csv.DictReader(f))
+    
+    if not rows:
+        return targets
+    
+    ip_column = None
+    port_column = None
+    ip_names = ['ip', 'IP', 'host', 'Host', 'domain', '域名', 'address', '地址', 'target', '目标']
+    port_names = ['port', 'Port', 'PORT', '端口']
+    for header in rows[0].keys():
+        if any(name in header for name in ip_names):
+            ip_column = header
+        if any(name in header for name in port_names):
+            port_column = header
+    
+    for row in rows:
+        if ip_column and ip_column in row:
+            host = row[ip_column].strip()
+            host = host.replace('http://', '').replace('https://', '')
+            if '/' in host:
+                host = host.split('/')[0]
+            port = 11434
+            if port_column and port_column in row and row[port_column]:
+                try:
+                    port = int(row[port_column])
+                except ValueError:
+                    port = 11434
+            if ':' in host:
+                parts = host.split(':')
+                host = parts[0]
+                try:
+                    port = int(parts[1])
+                except ValueError:
+                    pass
+            if host:
+                targets.append((host, port))
+    return targets
+
+
+def write_sample(file_path: str, rows: int):
+    """生成类似资产测绘平台导出的CSV：多列，部分主机带协议前缀和端口"""
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["host", "ip", "port", "title", "country", "server", "lastupdatetime"])
+        for index, (ip, _) in enumerate(DataParser.parse_ip_range("10.0.0.0/8")[:rows]):
+            host = f"http://{ip}:11434" if index % 3 == 0 else ip
+            writer.writerow([host, ip, 11434, "Ollama", "中国", "", "2024-05-01 12:00:00"])
+
+
+def measure(name: str, parse, file_path: str) -> dict:
+    """解析两次：第一次计时，第二次开启tracemalloc统计内存峰值"""
+    gc.collect()
+    start = time.perf_counter()
+    count = len(parse(file_path))
+    elapsed = time.perf_counter() - start
+    
+    gc.collect()
+    tracemalloc.start()
+    parse(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {"parser": name, "targets": count, "seconds": round(elapsed, 2),
+            "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV目标解析基准测试")
+    parser.add_argument("--rows", type=int, default=1000000, help="CSV行数")
+    parser.add_argument("--out-dir", default=os.path.join("result", "bench"), help="临时文件目录")
+    args = parser.parse_args()
+    
+    os.makedirs(args.out_dir, exist_ok=True)
+    file_path = os.path.join(args.out_dir, "bench_targets.csv")
+    write_sample(file_path, args.rows)
+    print(json.dumps({"file_mb": round(os.path.getsize(file_path) / 1024 / 1024, 1)}))
+    
+    for name, parse in (("legacy", legacy_parse_csv), ("streaming", DataParser._parse_csv)):
+        print(json.dumps(measure(name, parse, file_path), ensure_ascii=False))
+    
+    # 只统计目标数量时不保留目标列表
+    start = time.perf_counter()
+    count = sum(1 for _ in DataParser.iter_csv(file_path))
+    print(json.dumps({"parser": "streaming_iter", "targets": count,
+                      "seconds": round(time.perf_counter() - start, 2)}))
+    os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
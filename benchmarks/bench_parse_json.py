@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+JSON目标解析基准测试
+对比旧版 _parse_json（json.load 整个文档后递归提取）与当前流式解析的耗时和内存峰值
+
+用法:
+    python -m benchmarks.bench_parse_json [--rows 500000] [--layout results|nested] [--out-dir result/bench]
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from modules.data_parser import DataParser
+
+
+def legacy_parse_json(file_path: str) -> list:
+    """重构前的JSON解析实现，仅用于对比"""
+    targets = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if isinstance(data, dict) and 'results' in data:
+        results = data['results']
+        if isinstance(results, list):
+            for item in results:
+                if isinstance(item, dict):
+                    host = item.get('ip') or item.get('host') or item.get('domain')
+                    port = item.get('port', 11434)
+                    if host:
+                        host = str(host).replace('http://', '').replace('https://', '')
+                        if '/' in host:
+                            host = host.split('/')[0]
+                        if ':' in host and not port:
+                            parts = host.split(':')
+                            host = parts[0]
+                            try:
+                                port = int(parts[1])
+                            except ValueError:
+                                port = 11434
+                        try:
+                            port = int(port)
+                        except (TypeError, ValueError):
+                            port = 11434
+                        targets.append((host, port))
+            return targets
+    
+    def extract_from_json(obj):
+        if isinstance(obj, dict):
+            if 'ip' in obj or 'host' in obj or 'domain' in obj:
+                host = obj.get('ip') or obj.get('host') or obj.get('domain')
+                port = obj.get('port', 11434)
+                if host:
+                    host = str(host).replace('http://', '').replace('https://', '')
+                    if '/' in host:
+                        host = host.split('/')[0]
+                    try:
+                        port = int(port)
+                    except (TypeError, ValueError):
+                        port = 11434
+                    targets.append((host, port))
+            else:
+                for value in obj.values():
+                    extract_from_json(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                extract_from_json(item)
+    
+    extract_from_json(data)
+    return targets
+
+
+def write_sample(file_path: str, rows: int, layout: str):
+    """
+    生成测试文件，逐条写入，不在内存中构建整个文档
+    
+    results: 资产测绘平台导出格式 {"query": ..., "results": [{...}, ...]}
+    nested: 目标嵌套在多层对象中 [{"asset": {"service": {"ip": ..., "port": ...}}}, ...]
+    """
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('{"query": "app=\\"Ollama\\"", "results": [\n' if layout == "results" else '[\n')
+        for index, (ip, _) in enumerate(DataParser.parse_ip_range("10.0.0.0/8")[:rows]):
+            if index:
+                f.write(',\n')
+            record = {"ip": ip, "port": 11434, "title": "Ollama", "country": "中国",
+                      "banner": "HTTP/1.1 200 OK", "tags": ["llm", "ollama"]}
+            if layout == "nested":
+                record = {"id": index, "asset": {"service": record, "geo": {"country": "中国"}}}
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n]}' if layout == "results" else '\n]')
+
+
+def measure(name: str, parse, file_path: str) -> dict:
+    """解析两次：第一次计时，第二次开启tracemalloc统计内存峰值"""
+    gc.collect()
+    start = time.perf_counter()
+    count = parse(file_path)
+    elapsed = time.perf_counter() - start
+    
+    gc.collect()
+    tracemalloc.start()
+    parse(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {"parser": name, "targets": count, "seconds": round(elapsed, 2),
+            "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON目标解析基准测试")
+    parser.add_argument("--rows", type=int, default=500000, help="记录数")
+    parser.add_argument("--layout", choices=["results", "nested"], default="results", help="文件结构")
+    parser.add_argument("--out-dir", default=os.path.join("result", "bench"), help="临时文件目录")
+    args = parser.parse_args()
+    
+    os.makedirs(args.out_dir, exist_ok=True)
+    file_path = os.path.join(args.out_dir, "bench_targets.json")
+    write_sample(file_path, args.rows, args.layout)
+    print(json.dumps({"file_mb": round(os.path.getsize(file_path) / 1024 / 1024, 1),
+                      "layout": args.layout}))
+    
+    parsers = (
+        ("legacy", lambda path: len(legacy_parse_json(path))),
+        ("streaming", lambda path: len(DataParser._parse_json(path))),
+        # 只统计目标数量时不保留目标列表，内存峰值与文件大小无关
+        ("streaming_iter", lambda path: sum(1 for _ in DataParser.iter_json(path))),
+    )
+    for name, parse in parsers:
+        print(json.dumps(measure(name, parse, file_path), ensure_ascii=False))
+    os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
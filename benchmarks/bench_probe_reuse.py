@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+连接复用基准测试
+启动本地Ollama桩服务，对比“端口检测+requests两次请求”、“单连接复用”以及
+“单连接复用+HTTP管线化”三种探测方式的每目标TCP连接数和耗时
+
+用法:
+    python -m benchmarks.bench_probe_reuse [--targets 300] [--rtt 0.005]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from modules.ollama_scanner import OllamaScanner
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """模拟Ollama的 /api/version 与 /api/tags 接口，支持keep-alive"""
+    
+    protocol_version = "HTTP/1.1"
+    rtt = 0.0
+    connections = 0
+    lock = threading.Lock()
+    
+    def setup(self):
+        # 每个新连接额外等待一个RTT，模拟握手开销
+        with StubOllamaHandler.lock:
+            StubOllamaHandler.connections += 1
+        time.sleep(self.rtt)
+        super().setup()
+    
+    def do_GET(self):
+        time.sleep(self.rtt)
+        if self.path == "/api/version":
+            body = json.dumps({"version": "0.0.0-stub"}).encode()
+        elif self.path == "/api/tags":
+            body = json.dumps({"models": [{"name": "stub:latest"}]}).encode()
+        else:
+            body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def run(reuse_connection: bool, pipelining: bool, ports: list, targets: int, threads: int) -> dict:
+    """执行一轮扫描并统计连接数与耗时"""
+    scanner = OllamaScanner(timeout=5, reuse_connection=reuse_connection, pipelining=pipelining)
+    StubOllamaHandler.connections = 0
+    
+    # 轮流访问多个端口，模拟扫描时每个目标都是新主机（连接池无法命中）
+    target_list = [("127.0.0.1", ports[i % len(ports)]) for i in range(targets)]
+    
+    start = time.perf_counter()
+    results = scanner.scan_batch(target_list, threads)
+    elapsed = time.perf_counter() - start
+    
+    assert all(r.vulnerable for r in results), "桩服务应全部判定为未授权访问"
+    return {
+        "mode": ("reuse+pipelining" if pipelining else "reuse") if reuse_connection else "requests",
+        "seconds": round(elapsed, 3),
+        "targets_per_second": round(targets / elapsed, 1),
+        "tcp_connections_per_target": round(StubOllamaHandler.connections / targets, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="连接复用基准测试")
+    parser.add_argument("--targets", type=int, default=300, help="探测次数")
+    parser.add_argument("--hosts", type=int, default=32, help="桩服务数量（每个监听一个端口）")
+    parser.add_argument("--threads", type=int, default=10, help="并发线程数")
+    parser.add_argument("--rtt", type=float, default=0.005, help="桩服务模拟的往返延迟（秒）")
+    args = parser.parse_args()
+    
+    StubOllamaHandler.rtt = args.rtt
+    servers = []
+    for _ in range(args.hosts):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    ports = [server.server_address[1] for server in servers]
+    
+    try:
+        for reuse, pipelining in ((False, False), (True, False), (True, True)):
+            print(json.dumps(run(reuse, pipelining, ports, args.targets, args.threads), 
+                             ensure_ascii=False))
+    finally:
+        for server in servers:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+扫描结果内存基准测试
+用tracemalloc统计旧版（普通类 + 构造时格式化时间字符串）与当前 __slots__ 版 ScanResult
+在大规模扫描（绝大多数为端口未开放）下每个结果占用的字节数
+
+用法:
+    python -m benchmarks.bench_result_memory [--targets 1000000] [--hit-rate 0.001]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from modules.data_parser import DataParser
+from modules.ollama_scanner import ScanResult
+
+
+class LegacyScanResult:
+    """重构前的扫描结果实现，仅用于对比"""
+    
+    def __init__(self, host, port, vulnerable, version="", models=None, error=""):
+        self.host = host
+        self.port = port
+        self.vulnerable = vulnerable
+        self.version = version
+        self.models = models or []
+        self.error = error
+        self.timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def measure(result_cls, targets, hit_every: int) -> dict:
+    """构造一轮扫描的全部结果并统计内存"""
+    gc.collect()
+    tracemalloc.start()
+    
+    start = time.perf_counter()
+    results = []
+    for index, (host, port) in enumerate(targets):
+        if index % hit_every == 0:
+            results.append(result_cls(host, port, True, version="0.5.7", models=["llama3:8b", "qwen2:7b"]))
+        else:
+            # 错误信息按扫描器中的写法动态拼接，模拟真实场景中的重复字符串
+            results.append(result_cls(host, port, False, error="".join(["端口", "未开放"])))
+    elapsed = time.perf_counter() - start
+    
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    count = len(results)
+    del results
+    return {
+        "class": result_cls.__name__,
+        "results": count,
+        "bytes_per_result": round(current / count, 1),
+        "total_mb": round(current / 1024 / 1024, 1),
+        "build_seconds": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描结果内存基准测试")
+    parser.add_argument("--targets", type=int, default=1000000, help="结果数量")
+    parser.add_argument("--hit-rate", type=float, default=0.001, help="未授权访问命中比例")
+    args = parser.parse_args()
+    
+    targets = DataParser.parse_ip_range("10.0.0.0/8")[:args.targets]
+    hit_every = max(int(1 / args.hit_rate), 1) if args.hit_rate > 0 else args.targets + 1
+    
+    for result_cls in (LegacyScanResult, ScanResult):
+        print(json.dumps(measure(result_cls, targets, hit_every), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+用 python -X importtime 统计导入入口模块（默认gui）的累计耗时，检查重量级依赖是否被提前导入，
+超出预算时以退出码1结束，可用于打包前的检查
+
+用法:
+    python -m benchmarks.bench_startup [--module gui] [--repeat 5] [--budget-ms 150]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# 只应在首次使用时导入的重量级依赖
+DEFERRED_MODULES = ("openpyxl", "requests", "urllib3", "http.client", "concurrent.futures",
+                    "sqlite3", "asyncio")
+
+
+def import_once(module: str) -> dict:
+    """
+    在新进程中导入模块一次
+    
+    Returns:
+        dict: {模块名: 累计导入耗时（微秒）}
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--module", default="gui", help="入口模块")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取中位数")
+    parser.add_argument("--budget-ms", type=float, default=150, help="入口模块导入耗时预算（毫秒）")
+    args = parser.parse_args()
+    
+    # 第一次运行用于生成字节码缓存，不计入结果
+    import_once(args.module)
+    runs = [import_once(args.module) for _ in range(args.repeat)]
+    
+    total_ms = statistics.median(run[args.module] for run in runs) / 1000
+    loaded = [name for name in DEFERRED_MODULES if name in runs[-1]]
+    top = sorted(((name, cumulative / 1000) for name, cumulative in runs[-1].items()
+                  if name.startswith(("modules.", "ui.", "yaml", "tkinter"))),
+                 key=lambda item: item[1], reverse=True)[:10]
+    
+    print(json.dumps({
+        "module": args.module,
+        "import_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "deferred_loaded": loaded,
+        "top_ms": {name: round(ms, 1) for name, ms in top},
+    }, ensure_ascii=False, indent=2))
+    
+    if total_ms > args.budget_ms or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
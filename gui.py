@@ -6,17 +6,21 @@ Ollama扫描工具 - 主GUI程序（重构版）
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import queue
 import os
-import sys
-import yaml
 from datetime import datetime
 
 # 导入自定义模块
+from modules.config_loader import load_config
 from modules.data_parser import DataParser
-from modules.ollama_scanner import OllamaScanner
+from modules.ollama_scanner import create_scanner
 from modules.exporter import ResultExporter
+from modules.scan_stats import ScanStats
+from modules.target_index import TargetIndex
 from ui.tab_file_scan import FileScanTab
 from ui.tab_detail import DetailTab
+from ui.virtual_tree import VirtualResultTree
+from ui.concurrency_graph import ConcurrencyGraph
 
 
 class OllamaScanGUI:
@@ -48,9 +52,17 @@ class OllamaScanGUI:
         
         # 扫描相关变量
         self.scan_results = []
+        self.scan_stats = ScanStats()
         self.scanning = False
         self.stop_scan = False
         self.scanner = None
+        self.auto_save_path = None
+        
+        # 扫描线程把结果放入队列，由界面定时器批量取出刷新
+        self.result_queue = queue.Queue()
+        gui_config = self.config.get("gui", {})
+        self.refresh_interval = max(int(1000 / gui_config.get("refresh_hz", 10)), 1)
+        self.max_batch = gui_config.get("max_batch", 5000)
         
         # 详情Tab管理
         self.detail_tabs = []
@@ -65,23 +77,7 @@ class OllamaScanGUI:
     
     def load_config(self):
         """加载配置文件"""
-        config_path = "config.yaml"
-        
-        if getattr(sys, 'frozen', False):
-            config_path = os.path.join(os.path.dirname(sys.executable), "config.yaml")
-        
-        if not os.path.exists(config_path):
-            default_config = {
-                "scan": {"default_port": 11434, "default_threads": 10, "timeout": 5},
-                "export": {"default_path": "./result", "default_format": "csv"},
-                "gui": {"window_width": 1200, "window_height": 800}
-            }
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(default_config, f, allow_unicode=True)
-            return default_config
-        
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_config()
     
     def setup_styles(self):
         """配置界面样式"""
@@ -162,6 +158,8 @@ class OllamaScanGUI:
         self.scan_btn2.pack(side=tk.LEFT, padx=5)
         self.stop_btn2 = ttk.Button(button_frame, text="停止扫描", command=self.stop_scanning, state=tk.DISABLED)
         self.stop_btn2.pack(side=tk.LEFT, padx=5)
+        self.resume_btn2 = ttk.Button(button_frame, text="继续扫描", command=lambda: self.start_scan(2, resume=True))
+        self.resume_btn2.pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="清空结果", command=lambda: self.clear_results(2)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="导出结果", command=lambda: self.export_results(2)).pack(side=tk.LEFT, padx=5)
         
@@ -170,6 +168,20 @@ class OllamaScanGUI:
         self.status_label2 = ttk.Label(parent, text="就绪")
         self.status_label2.pack(fill=tk.X, padx=5)
         
+        # 两阶段扫描时单独显示端口探测进度
+        self.sweep_progress2 = None
+        self.sweep_label2 = None
+        if self.config.get("scan", {}).get("engine") == "two_phase":
+            self.sweep_progress2 = ttk.Progressbar(parent, mode='determinate')
+            self.sweep_progress2.pack(fill=tk.X, padx=5, pady=2)
+            self.sweep_label2 = ttk.Label(parent, text="端口探测: 就绪")
+            self.sweep_label2.pack(fill=tk.X, padx=5)
+        
+        # 自适应并发时显示并发数变化曲线
+        self.concurrency_graph2 = None
+        if self.config.get("scan", {}).get("adaptive_concurrency", False):
+            self.concurrency_graph2 = ConcurrencyGraph(parent)
+        
         self.create_result_tree(parent, 2)
     
     def create_tab3(self, parent):
@@ -195,35 +207,14 @@ class OllamaScanGUI:
         result_frame = ttk.LabelFrame(parent, text="扫描结果（双击查看详情）", padding=5)
         result_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        columns = ("host", "port", "status", "version", "models", "error", "time")
-        tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=15)
-        
-        tree.heading("host", text="主机")
-        tree.heading("port", text="端口")
-        tree.heading("status", text="状态")
-        tree.heading("version", text="版本")
-        tree.heading("models", text="模型")
-        tree.heading("error", text="错误信息")
-        tree.heading("time", text="时间")
-        
-        tree.column("host", width=150)
-        tree.column("port", width=60)
-        tree.column("status", width=100)
-        tree.column("version", width=100)
-        tree.column("models", width=200)
-        tree.column("error", width=150)
-        tree.column("time", width=150)
-        
-        scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        result_view = VirtualResultTree(result_frame)
+        tree = result_view.tree
         
         # 绑定双击事件
         tree.bind("<Double-1>", lambda e: self.on_result_double_click(tree))
         
         if tab_num == 2:
+            self.result_view2 = result_view
             self.tree2 = tree
     
     def on_result_double_click(self, tree):
@@ -275,8 +266,14 @@ class OllamaScanGUI:
                               self.on_detail_tab_close)
         self.detail_tabs.append(detail_tab)
     
-    def start_scan(self, tab):
-        """开始扫描"""
+    def start_scan(self, tab, resume=False):
+        """
+        开始扫描
+        
+        Args:
+            tab: 发起扫描的Tab编号
+            resume: 是否从断点日志继续，跳过上次已完成的目标
+        """
         if self.scanning:
             messagebox.showwarning("警告", "扫描正在进行中")
             return
@@ -288,6 +285,8 @@ class OllamaScanGUI:
             
             start = self.tab1.start_index_var.get()
             end = self.tab1.end_index_var.get()
+            # 扫描到文件末尾时断点日志不记录结束位置：解析中途开始的扫描在解析完成后仍能继续
+            to_end = end == 0 or (end == len(self.tab1.parsed_targets) and not self.tab1.parsing)
             
             if end == 0:
                 end = len(self.tab1.parsed_targets)
@@ -296,13 +295,20 @@ class OllamaScanGUI:
                 messagebox.showwarning("警告", "扫描范围无效")
                 return
             
+            # 文件仍在解析时只扫描已解析出的部分；规范化并去除重复目标在扫描线程中进行，大文件不阻塞界面
             targets = self.tab1.parsed_targets[start:end]
+            partial = self.tab1.parsing
+            job = self.file_job(self.tab1.file_path_var.get(), start, "" if to_end else end)
             threads = self.tab1.threads_var.get()
-            tree = self.tab1.tree
+            result_view = self.tab1.result_view
             progress = self.tab1.progress
             status_label = self.tab1.status_label
+            sweep_progress = self.tab1.sweep_progress
+            sweep_label = self.tab1.sweep_label
+            concurrency_graph = self.tab1.concurrency_graph
             scan_btn = self.tab1.scan_btn
             stop_btn = self.tab1.stop_btn
+            resume_btn = self.tab1.resume_btn
             
         else:  # tab == 2
             ip_range = self.ip_range_var.get()
@@ -320,78 +326,293 @@ class OllamaScanGUI:
                 messagebox.showerror("错误", f"解析IP段失败: {str(e)}")
                 return
             
+            partial = False
+            job = f"range|{ip_range}|{port}"
             threads = self.threads_var2.get()
-            tree = self.tree2
+            result_view = self.result_view2
             progress = self.progress2
             status_label = self.status_label2
+            sweep_progress = self.sweep_progress2
+            sweep_label = self.sweep_label2
+            concurrency_graph = self.concurrency_graph2
             scan_btn = self.scan_btn2
             stop_btn = self.stop_btn2
+            resume_btn = self.resume_btn2
         
-        # 清空之前的结果
-        for item in tree.get_children():
-            tree.delete(item)
-        self.scan_results = []
+        import sqlite3
+        
+        scan_config = self.config.get("scan", {})
+        journal_dir = scan_config.get("journal_dir")
+        if resume and not journal_dir:
+            messagebox.showwarning("警告", "未配置断点日志目录（scan.journal_dir），无法继续扫描")
+            return
+        
+        # 按配置创建扫描引擎（开启结果缓存时同时打开缓存文件，扫描结束或未能开始时关闭）
+        try:
+            self.scanner = create_scanner(scan_config)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("错误", f"打开结果缓存失败: {str(e)}")
+            return
+        
+        # 打开断点日志；读取已完成的目标和结果（继续扫描）或清空日志（重新扫描）在扫描线程中进行
+        from modules.scan_journal import ScanJournal, pending_targets
+        
+        journal = None
+        if journal_dir:
+            try:
+                journal = ScanJournal(ScanJournal.job_path(journal_dir, job),
+                                      scan_config.get("journal_flush_interval", 1))
+            except (sqlite3.Error, OSError) as e:
+                self.close_cache()
+                messagebox.showerror("错误", f"打开断点日志失败: {str(e)}")
+                return
+        
+        # 开启自动保存时扫描结果边扫边写入导出文件，继续扫描时扫描线程先写入之前的结果
+        sink = None
+        export_config = self.config.get("export", {})
+        if export_config.get("auto_save", False):
+            file_path = os.path.join(export_config.get("default_path", "./result"),
+                                     f"scan_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            try:
+                sink = ResultExporter.open_sink(file_path, export_config.get("default_format", "csv"))
+            except Exception as e:
+                if journal is not None:
+                    journal.close()
+                self.close_cache()
+                messagebox.showerror("错误", f"创建自动保存文件失败: {str(e)}")
+                return
+        self.auto_save_path = sink.file_path if sink else None
+        
+        # 清空之前的结果，结果列表与表格共用同一个后台存储
+        result_view.clear()
+        self.scan_results = result_view.results
+        self.scan_stats = ScanStats()
         
         # 更新UI状态
         scan_btn.config(state=tk.DISABLED)
+        resume_btn.config(state=tk.DISABLED)
         stop_btn.config(state=tk.NORMAL)
         progress['value'] = 0
-        progress['maximum'] = len(targets)
-        status_label.config(text=f"准备扫描 {len(targets)} 个目标...")
+        status_label.config(text="正在读取断点日志..." if resume else "正在准备扫描目标...")
+        if sweep_progress is not None:
+            sweep_progress['value'] = 0
+            sweep_label.config(text="端口探测: 准备中...")
+        if concurrency_graph is not None:
+            concurrency_graph.reset()
         
         # 启动扫描线程
         self.scanning = True
         self.stop_scan = False
+        self.result_queue = queue.Queue()
+        scan_done = threading.Event()
+        sweep_state = []
+        replayed = []
+        prepared = []
+        aborted = []
         
         def scan_thread():
-            timeout = self.config.get("scan", {}).get("timeout", 5)
-            self.scanner = OllamaScanner(timeout=timeout)
-            
             def callback(result, current, total):
+                if journal is not None:
+                    journal.record(result)
+                if sink is not None:
+                    sink.write(result)
                 if not self.stop_scan:
-                    self.root.after(0, lambda: self.update_scan_result(
-                        result, current, total, tree, progress, status_label))
+                    self.result_queue.put((result, current, total))
             
             def stop_flag():
                 return self.stop_scan
             
-            self.scanner.scan_batch(targets, threads, callback, stop_flag)
+            def sweep_callback(swept, total, open_count):
+                sweep_state[:] = [swept, total, open_count]
             
-            self.root.after(0, lambda: self.scan_finished(scan_btn, stop_btn, status_label))
+            try:
+                # 继续扫描时读取已完成的目标，之前的结果先写入自动保存文件再交给界面显示
+                done = None
+                if journal is not None and resume:
+                    done = journal.done_keys()
+                    if not done:
+                        aborted.append("没有找到该任务的扫描记录")
+                        self.root.after(0, messagebox.showinfo, "提示", "没有找到该任务的扫描记录，请直接开始扫描")
+                        return
+                    previous = list(journal.load_results())
+                    if sink is not None:
+                        sink.write_many(previous)
+                    replayed.append(previous)
+                elif journal is not None:
+                    journal.reset()
+                
+                scan_targets = targets
+                dropped = 0
+                if tab == 1:
+                    scan_targets = TargetIndex.build(targets)
+                    dropped = scan_targets.dropped
+                if done:
+                    scan_targets = pending_targets(scan_targets, done)
+                prepared[:] = [len(scan_targets), dropped, len(done) if done else 0]
+                
+                if sweep_progress is not None:
+                    self.scanner.scan_batch(scan_targets, threads, callback, stop_flag, collect=False,
+                                            sweep_callback=sweep_callback)
+                else:
+                    self.scanner.scan_batch(scan_targets, threads, callback, stop_flag, collect=False)
+            except Exception as e:
+                # 读取断点日志、准备目标、写入断点日志或自动保存文件、扫描本身出错时提示错误，不显示扫描完成
+                aborted.append(f"扫描失败: {str(e)}")
+                self.root.after(0, messagebox.showerror, "错误", f"扫描失败: {str(e)}")
+            finally:
+                if journal is not None:
+                    journal.close()
+                if sink is not None:
+                    try:
+                        sink.close()
+                    except Exception as e:
+                        print(f"自动保存失败: {str(e)}")
+                        self.auto_save_path = None
+                self.close_cache()
+                scan_done.set()
+        
+        def drain():
+            # 每个刷新周期批量取出队列中的结果，限制界面重绘频率
+            batch = []
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self.result_queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            # 断点日志中之前的结果、准备好的目标都在扫描线程开始扫描前给出，先于本次的结果处理
+            if replayed:
+                result_view.append(replayed.pop())
+            if prepared:
+                self.update_scan_targets(*prepared, partial, progress, status_label, sweep_progress)
+                prepared.clear()
+            if batch:
+                self.update_scan_results(batch, result_view, progress, status_label)
+            if sweep_state:
+                self.update_sweep_progress(*sweep_state, sweep_progress, sweep_label)
+            # 并发控制器在扫描线程开始批量扫描时创建
+            if concurrency_graph is not None and self.scanner.controller is not None:
+                concurrency_graph.update(self.scanner.controller)
+            
+            if scan_done.is_set() and self.result_queue.empty():
+                self.scan_finished(scan_btn, stop_btn, resume_btn, status_label,
+                                   aborted[0] if aborted else None)
+            else:
+                self.root.after(self.refresh_interval, drain)
         
         threading.Thread(target=scan_thread, daemon=True).start()
+        self.root.after(self.refresh_interval, drain)
     
-    def update_scan_result(self, result, current, total, tree, progress, status_label):
-        """更新扫描结果"""
-        self.scan_results.append(result)
-        
-        status = "✅ 未授权访问" if result.vulnerable else "❌ 无法访问"
-        models_str = ", ".join(result.models[:3]) if result.models else ""
-        if len(result.models) > 3:
-            models_str += f" (+{len(result.models)-3})"
-        
-        values = (result.host, result.port, status, result.version, models_str, result.error, result.timestamp)
-        
-        item = tree.insert("", tk.END, values=values)
-        
-        if result.vulnerable:
-            tree.item(item, tags=('vulnerable',))
-            tree.tag_configure('vulnerable', background='#90EE90')
+    @staticmethod
+    def file_job(file_path, start, end):
+        """
+        文件扫描任务的断点日志标识：文件路径、大小和修改时间，以及请求的扫描范围
+        
+        Args:
+            file_path: 目标文件路径
+            start: 起始序号
+            end: 结束序号，扫描到文件末尾时为空字符串
+        
+        Returns:
+            str: 任务标识
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+            identity = f"{stat.st_size}|{stat.st_mtime_ns}"
+        except OSError:
+            identity = ""
+        return f"file|{file_path}|{identity}|{start}|{end}"
+    
+    def close_cache(self):
+        """关闭当前扫描引擎的结果缓存（提交缓冲区中的结果并淘汰多余结果）"""
+        import sqlite3
         
+        if self.scanner is None or self.scanner.cache is None:
+            return
+        try:
+            self.scanner.cache.close()
+        except sqlite3.Error as e:
+            print(f"关闭结果缓存失败: {str(e)}")
+    
+    def update_scan_targets(self, total, dropped, skipped, partial, progress, status_label, sweep_progress):
+        """
+        扫描目标准备完成后更新进度条范围和状态
+        
+        Args:
+            total: 待扫描的目标数
+            dropped: 去除的重复目标数
+            skipped: 继续扫描时跳过的已完成目标数
+            partial: 文件是否仍在解析（只扫描已解析的部分）
+        """
+        self.scan_stats.total = total
+        progress['maximum'] = total
+        notes = []
+        if partial:
+            notes.append("文件仍在解析，只扫描已解析的部分")
+        if dropped:
+            notes.append(f"已去除 {dropped} 个重复目标")
+        if skipped:
+            notes.append(f"已跳过 {skipped} 个已完成目标")
+        if notes:
+            status_label.config(text=f"准备扫描 {total} 个目标（{'，'.join(notes)}）...")
+        else:
+            status_label.config(text=f"准备扫描 {total} 个目标...")
+        if sweep_progress is not None:
+            sweep_progress['maximum'] = total
+    
+    def update_scan_results(self, batch, result_view, progress, status_label):
+        """批量更新扫描结果"""
+        results = [result for result, _, _ in batch]
+        for result in results:
+            self.scan_stats.add(result)
+        result_view.append(results)
+        
+        _, current, total = batch[-1]
         progress['value'] = current
-        vulnerable_count = sum(1 for r in self.scan_results if r.vulnerable)
-        status_label.config(text=f"扫描进度: {current}/{total} - 发现未授权访问: {vulnerable_count}")
-        
-        tree.see(item)
+        stats = self.scan_stats
+        text = (f"扫描进度: {current}/{total} - 发现未授权访问: {stats.vulnerable} "
+                f"- 速率: {stats.throughput:.1f} 个/秒")
+        cache = self.scanner.cache
+        if cache is not None:
+            text += f" - 缓存命中率: {cache.hit_ratio:.1%}"
+        status_label.config(text=text)
+    
+    def update_sweep_progress(self, swept, total, open_count, sweep_progress, sweep_label):
+        """更新端口探测阶段进度"""
+        sweep_progress['value'] = swept
+        sweep_label.config(text=f"端口探测: {swept}/{total} - 开放端口: {open_count}")
     
-    def scan_finished(self, scan_btn, stop_btn, status_label):
-        """扫描完成"""
+    def scan_finished(self, scan_btn, stop_btn, resume_btn, status_label, aborted=None):
+        """
+        扫描结束
+        
+        Args:
+            aborted: 扫描未能完成（出错或没有可继续的记录）时显示的状态，None表示正常结束
+        """
         self.scanning = False
         scan_btn.config(state=tk.NORMAL)
+        resume_btn.config(state=tk.NORMAL)
         stop_btn.config(state=tk.DISABLED)
         
-        vulnerable_count = sum(1 for r in self.scan_results if r.vulnerable)
-        status_label.config(text=f"扫描完成！共扫描 {len(self.scan_results)} 个目标，发现 {vulnerable_count} 个未授权访问")
+        self.scan_stats.finish()
+        if aborted is not None:
+            status_label.config(text=f"{aborted}（已完成 {self.scan_stats.completed} 个目标）")
+            return
+        
+        text = f"扫描完成！{self.scan_stats.summary()}"
+        cache = self.scanner.cache
+        if cache is not None:
+            text += f"；缓存命中 {cache.hits}/{cache.lookups}（{cache.hit_ratio:.1%}）"
+        if self.auto_save_path:
+            text += f"；结果已保存到 {self.auto_save_path}"
+        timing = self.scan_stats.timing_summary()
+        if timing:
+            text += f"\n{timing}"
+        status_label.config(text=text)
     
     def stop_scanning(self):
         """停止扫描"""
@@ -401,10 +622,10 @@ class OllamaScanGUI:
     
     def clear_results(self, tab):
         """清空结果"""
-        tree = self.tab1.tree if tab == 1 else self.tree2
-        for item in tree.get_children():
-            tree.delete(item)
-        self.scan_results = []
+        result_view = self.tab1.result_view if tab == 1 else self.result_view2
+        result_view.clear()
+        self.scan_results = result_view.results
+        self.scan_stats = ScanStats()
         
         status_label = self.tab1.status_label if tab == 1 else self.status_label2
         status_label.config(text="就绪")
@@ -417,13 +638,15 @@ class OllamaScanGUI:
         
         export_window = tk.Toplevel(self.root)
         export_window.title("导出设置")
-        export_window.geometry("400x250")
+        export_window.geometry("520x250")
         
         ttk.Label(export_window, text="导出格式:").grid(row=0, column=0, padx=10, pady=10, sticky=tk.W)
-        format_var = tk.StringVar(value="csv")
+        format_var = tk.StringVar(value=self.config.get("export", {}).get("default_format", "csv"))
         ttk.Radiobutton(export_window, text="CSV", variable=format_var, value="csv").grid(row=0, column=1, sticky=tk.W)
         ttk.Radiobutton(export_window, text="JSON", variable=format_var, value="json").grid(row=0, column=2, sticky=tk.W)
-        ttk.Radiobutton(export_window, text="Excel", variable=format_var, value="excel").grid(row=0, column=3, sticky=tk.W)
+        ttk.Radiobutton(export_window, text="JSONL", variable=format_var, value="jsonl").grid(row=0, column=3, sticky=tk.W)
+        ttk.Radiobutton(export_window, text="Excel", variable=format_var, value="excel").grid(row=0, column=4, sticky=tk.W)
+        ttk.Radiobutton(export_window, text="归档", variable=format_var, value="archive").grid(row=0, column=5, sticky=tk.W)
         
         ttk.Label(export_window, text="导出范围:").grid(row=1, column=0, padx=10, pady=10, sticky=tk.W)
         export_all_var = tk.BooleanVar(value=True)
@@ -439,24 +662,30 @@ class OllamaScanGUI:
             vulnerable_only = not export_all_var.get()
             filename = filename_var.get()
             
-            results_to_export = [r.to_dict() for r in self.scan_results]
-            if vulnerable_only:
-                results_to_export = ResultExporter.filter_results(results_to_export, vulnerable_only=True)
-            
-            if not results_to_export:
+            if vulnerable_only and not any(r.vulnerable for r in self.scan_results):
                 messagebox.showwarning("警告", "没有符合条件的结果")
                 return
             
             default_path = self.config.get("export", {}).get("default_path", "./result")
             file_path = os.path.join(default_path, filename)
             
-            success = ResultExporter.export(results_to_export, file_path, format_type)
+            # 逐条写入导出文件，不复制结果列表
+            try:
+                with ResultExporter.open_sink(file_path, format_type, vulnerable_only) as sink:
+                    sink.write_many(self.scan_results)
+            except Exception as e:
+                messagebox.showerror("错误", f"导出失败: {str(e)}")
+                return
+            
+            # 扫描统计（含各阶段耗时分位数）写入同名的 _stats.json
+            message = f"成功导出 {sink.count} 条结果到:\n{sink.file_path}"
+            if self.scan_stats.completed:
+                stats_path = os.path.splitext(sink.file_path)[0] + "_stats.json"
+                if ResultExporter.export_stats(self.scan_stats.to_dict(), stats_path):
+                    message += f"\n扫描统计: {stats_path}"
             
-            if success:
-                messagebox.showinfo("成功", f"成功导出 {len(results_to_export)} 条结果到:\n{file_path}")
-                export_window.destroy()
-            else:
-                messagebox.showerror("错误", "导出失败")
+            messagebox.showinfo("成功", message)
+            export_window.destroy()
         
         ttk.Button(export_window, text="导出", command=do_export).grid(row=3, column=1, columnspan=2, pady=20)
 
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发模块
+按AIMD（加性增、乘性减）方式根据探测的完成耗时和超时比例调整同时进行中的探测数：
+没有拥塞迹象时逐步增加并发，超时比例或耗时明显高于基线时立即减半，避免本地端口耗尽和超时风暴
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD并发控制器，扫描引擎每完成一个探测调用一次 record，随时读取 limit 作为并发上限
+    
+    每累计 max(limit, min_samples) 个完成的探测评估一次（大约一轮并发的探测）：
+    超时比例超过基线 timeout_tolerance 以上（基线较高时按抽样误差放宽到三倍标准差），
+    或未超时探测的耗时中位数超过基线的 latency_factor 倍（且至少高出 latency_floor 秒）时判定为拥塞。
+    第一次拥塞前每轮并发翻倍（慢启动），之后每轮增加 increase，拥塞时乘以 decrease；
+    减小并发后的下一轮探测大多在减小之前开始，不作评估，避免一次拥塞连续减小多次。
+    基线每轮向观测值靠近一部分（指数加权平均），下降快、上升慢（耗时更低时直接取观测值）：
+    并发增加引起的超时和耗时上升会超过基线从而减小并发，目标组成长期变化（如连续一大段无响应的IP）时
+    基线在几十轮之后跟上，并发数不会一直停在下限
+    """
+    
+    # 观测值低于/高于基线时，基线每轮向观测值靠近的比例
+    BASELINE_DOWN = 0.2
+    BASELINE_UP = 0.05
+    # 保留的并发变化记录条数（供界面绘制曲线）
+    HISTORY_SIZE = 600
+    
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 200, increase: int = 1,
+                 decrease: float = 0.5, timeout_tolerance: float = 0.05,
+                 latency_factor: float = 2.0, latency_floor: float = 0.05, min_samples: int = 20):
+        """
+        Args:
+            initial: 初始并发数（限制在 minimum~maximum 之间）
+            minimum: 并发数下限
+            maximum: 并发数上限
+            increase: 慢启动结束后每轮增加的并发数
+            decrease: 拥塞时并发数乘以的系数
+            timeout_tolerance: 超时比例高出基线多少时判定为拥塞
+            latency_factor: 耗时中位数超过基线多少倍时判定为拥塞
+            latency_floor: 耗时中位数至少高出基线多少秒才判定为拥塞（本地或近距离目标耗时只有毫秒级，调度抖动就能翻倍）
+            min_samples: 每轮评估至少需要的完成探测数
+        """
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.increase = max(increase, 1)
+        self.decrease = decrease
+        self.timeout_tolerance = timeout_tolerance
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.min_samples = min_samples
+        self.slow_start = True
+        self.decreases = 0
+        self._skip_round = False
+        self._base_rate = None
+        self._base_latency = None
+        self._samples = 0
+        self._timeouts = 0
+        self._latencies = []
+        self._start_time = time.monotonic()
+        self.history = deque([(0.0, self.limit)], maxlen=self.HISTORY_SIZE)
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float, timed_out: bool):
+        """
+        记录一个完成的探测
+        
+        Args:
+            latency: 探测耗时（秒）
+            timed_out: 是否超时
+        """
+        with self._lock:
+            self._samples += 1
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._latencies.append(latency)
+            if self._samples >= max(self.limit, self.min_samples):
+                self._evaluate()
+    
+    def _evaluate(self):
+        """按本轮的超时比例和耗时中位数调整并发数"""
+        samples = self._samples
+        rate = self._timeouts / samples
+        latencies = sorted(self._latencies)
+        latency = latencies[len(latencies) // 2] if latencies else None
+        self._samples = 0
+        self._timeouts = 0
+        self._latencies = []
+        
+        if self._skip_round:
+            self._skip_round = False
+            return
+        
+        congested = False
+        base = self._base_rate
+        if base is not None:
+            # 大量目标本身无响应时基线超时比例较高，每轮的抽样波动也更大
+            noise = 3 * math.sqrt(base * (1 - base) / samples)
+            if rate > base + max(self.timeout_tolerance, noise):
+                congested = True
+        if (latency is not None and self._base_latency is not None
+                and latency > self._base_latency * self.latency_factor
+                and latency - self._base_latency > self.latency_floor):
+            congested = True
+        
+        if base is None:
+            self._base_rate = rate
+        else:
+            self._base_rate = base + (rate - base) * (self.BASELINE_DOWN if rate < base else self.BASELINE_UP)
+        if latency is not None:
+            if self._base_latency is None or latency <= self._base_latency:
+                self._base_latency = latency
+            else:
+                self._base_latency += (latency - self._base_latency) * self.BASELINE_UP
+        
+        if congested:
+            self.slow_start = False
+            self.decreases += 1
+            self._skip_round = True
+            limit = max(int(self.limit * self.decrease), self.minimum)
+        elif self.slow_start:
+            limit = min(self.limit * 2, self.maximum)
+        else:
+            limit = min(self.limit + self.increase, self.maximum)
+        
+        if limit != self.limit:
+            self.limit = limit
+            self.history.append((self.elapsed, limit))
+    
+    @property
+    def elapsed(self) -> float:
+        """控制器创建以来的秒数（与 history 中的时间同一基准）"""
+        return time.monotonic() - self._start_time
+    
+    def history_snapshot(self) -> List[Tuple[float, int]]:
+        """
+        并发数变化记录的副本（扫描线程会同时追加记录）
+        
+        Returns:
+            List[Tuple[float, int]]: [(秒数, 并发数), ...]
+        """
+        with self._lock:
+            return list(self.history)
+    
+    def to_dict(self) -> Dict:
+        """当前状态"""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "decreases": self.decreases,
+                "base_timeout_rate": None if self._base_rate is None else round(self._base_rate, 4),
+                "base_latency": None if self._base_latency is None else round(self._base_latency, 4),
+            }
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+异步扫描模块
+基于asyncio的扫描引擎，在单个事件循环中维持大量并发探测
+"""
+
+import asyncio
+import json
+import socket
+import time
+from typing import Optional, Callable, Tuple
+
+from modules.ollama_scanner import (OllamaScanner, PhaseTimer, ScanResult, serve_from_cache,
+                                    PHASE_CONNECT, PHASE_DNS, PHASE_TAGS, PHASE_VERSION)
+
+
+class AsyncOllamaScanner(OllamaScanner):
+    """asyncio版Ollama扫描器，结果与回调与线程版保持一致"""
+    
+    def __init__(self, timeout: int = 5, concurrency: int = 500, **kwargs):
+        """
+        初始化扫描器
+        
+        Args:
+            timeout: 读取超时时间（秒），每个响应最多等待的时间
+            concurrency: 同时进行的探测数量
+            **kwargs: 传递给 OllamaScanner 的其他参数（用于详情页命令执行）
+        """
+        super().__init__(timeout=timeout, **kwargs)
+        self.concurrency = concurrency
+    
+    @serve_from_cache
+    def scan_batch(self, targets, threads: int = 10,
+                   callback: Optional[Callable] = None,
+                   stop_flag: Optional[Callable] = None, collect: bool = True) -> list:
+        """
+        批量扫描目标
+        
+        Args:
+            targets: 目标列表 [(host, port), ...]
+            threads: 与线程版兼容的参数，实际并发数取 threads 与 concurrency 的较大值；
+                开启自适应并发时为初始并发数，并发数从该值开始调整，上限为 concurrency
+            callback: 回调函数，每完成一个目标时调用 callback(result, current, total)
+            stop_flag: 停止标志函数，返回True时停止扫描
+            collect: 是否保存并返回全部结果；为False时结果只交给回调，返回空列表，内存占用与目标数无关
+        
+        Returns:
+            list: 扫描结果列表
+        """
+        concurrency = threads if self.adaptive_bounds is not None else max(threads, self.concurrency)
+        return asyncio.run(self._scan_batch(targets, concurrency, callback, stop_flag, collect))
+    
+    async def _scan_batch(self, targets, concurrency: int,
+                          callback: Optional[Callable],
+                          stop_flag: Optional[Callable], collect: bool = True) -> list:
+        """
+        在事件循环中批量扫描，所有worker共享同一个目标迭代器
+        
+        开启自适应并发时按并发上限创建worker，worker取到目标后等待进行中的探测数低于控制器的并发数再开始探测
+        """
+        results = []
+        total = len(targets)
+        current = 0
+        iterator = iter(targets)
+        controller = self._new_controller(concurrency)
+        if controller is not None:
+            concurrency = controller.maximum
+        active = 0
+        slots = asyncio.Condition()
+        
+        async def worker():
+            nonlocal current, active
+            for host, port in iterator:
+                if stop_flag and stop_flag():
+                    return
+                
+                if controller is not None:
+                    async with slots:
+                        await slots.wait_for(lambda: active < controller.limit)
+                        active += 1
+                started = time.monotonic()
+                
+                try:
+                    result = await self.scan_single_async(host, port)
+                except Exception as e:
+                    result = ScanResult(host, port, False, error=f"扫描异常: {str(e)}")
+                
+                if controller is not None:
+                    latency = time.monotonic() - started
+                    controller.record(latency, self._timed_out(result, latency))
+                    async with slots:
+                        active -= 1
+                        # 只唤醒空出的名额对应数量的worker（并发数增加时可能空出多个）
+                        slots.notify(max(controller.limit - active, 0))
+                
+                if collect:
+                    results.append(result)
+                current += 1
+                
+                if callback:
+                    callback(result, current, total)
+        
+        async def watch_stop():
+            # 停止时直接取消进行中的探测，无需等待其超时
+            while True:
+                await asyncio.sleep(self.POLL_INTERVAL)
+                if stop_flag():
+                    for task in workers:
+                        task.cancel()
+                    return
+        
+        workers = [asyncio.create_task(worker()) for _ in range(max(min(concurrency, total), 1))]
+        watcher = asyncio.create_task(watch_stop()) if stop_flag else None
+        
+        # 一个worker出错（如回调写入结果失败）时取消其他worker；停止扫描时被取消的worker不算出错
+        done, pending = await asyncio.wait(workers, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if watcher:
+            watcher.cancel()
+        
+        # 与线程版一样把异常抛给调用方
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        
+        return results
+    
+    async def scan_single_async(self, host: str, port: int) -> ScanResult:
+        """
+        扫描单个目标（协程版本），版本和模型列表复用同一个TCP连接
+        
+        Args:
+            host: 主机地址
+            port: 端口号
+        
+        Returns:
+            ScanResult: 扫描结果（timings 中记录各阶段耗时）
+        """
+        timer = PhaseTimer(self.deadline)
+        result = await self._scan_phases_async(host, port, timer)
+        result.timings = timer.pack()
+        return result
+    
+    async def _scan_phases_async(self, host: str, port: int, timer: PhaseTimer) -> ScanResult:
+        """scan_single_async 的各阶段，每个阶段的超时都不超过截止前的剩余时间"""
+        # 先单独解析地址再连接，分别计时；建立连接即端口检测
+        # 主机名使用共用的解析线程池：事件循环默认的线程池在扫描结束时要等待卡住的解析返回
+        try:
+            try:
+                addresses = self._numeric_address(host, port)
+                if addresses is None:
+                    future = self._resolver_pool().submit(socket.getaddrinfo, host, port,
+                                                          type=socket.SOCK_STREAM)
+                    addresses = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                       timer.budget(self.connect_timeout))
+            finally:
+                timer.mark(PHASE_DNS)
+            try:
+                reader, writer, address = await asyncio.wait_for(
+                    self._open_first(addresses, port), timer.budget(self.connect_timeout))
+            finally:
+                timer.mark(PHASE_CONNECT)
+        except (asyncio.TimeoutError, socket.timeout):
+            # 连接超时单独记录，自适应并发据此判断拥塞
+            return ScanResult(host, port, False, error="连接超时")
+        except Exception:
+            return ScanResult(host, port, False, error="端口未开放")
+        
+        try:
+            # 获取版本信息，管线化时两个请求一起发出
+            paths = ["/api/version", "/api/tags"] if self.pipelining else ["/api/version"]
+            self._send_requests(writer, host, port, paths)
+            try:
+                status, body, keep_alive = await asyncio.wait_for(
+                    self._read_response(reader), timer.budget(self.timeout))
+            finally:
+                timer.mark(PHASE_VERSION)
+            
+            if status != 200:
+                return ScanResult(host, port, False, error="非Ollama服务")
+            
+            version = json.loads(body).get("version", "Unknown")
+            
+            # 服务端不支持长连接时重新建立连接并重新发送模型列表请求
+            if not keep_alive:
+                writer.close()
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(address, port), timer.budget(self.connect_timeout))
+                self._send_requests(writer, host, port, ["/api/tags"])
+            elif not self.pipelining:
+                self._send_requests(writer, host, port, ["/api/tags"])
+            
+            # 尝试获取模型列表（验证未授权访问）
+            try:
+                status, body, _ = await asyncio.wait_for(
+                    self._read_response(reader), timer.budget(self.timeout))
+            finally:
+                timer.mark(PHASE_TAGS)
+            
+            if status == 200:
+                tags_data = json.loads(body)
+                models = []
+                if "models" in tags_data:
+                    models = [model.get("name", "") for model in tags_data["models"]]
+                
+                return ScanResult(host, port, True, version=version, models=models)
+            else:
+                return ScanResult(host, port, False, version=version,
+                                error=f"无法访问API (状态码: {status})")
+        
+        except (asyncio.TimeoutError, socket.timeout):
+            return ScanResult(host, port, False, error="连接超时")
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            return ScanResult(host, port, False, error="连接失败")
+        except Exception as e:
+            return ScanResult(host, port, False, error=f"扫描错误: {str(e)}")
+        finally:
+            writer.close()
+    
+    @staticmethod
+    async def _open_first(addresses: list, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, str]:
+        """依次尝试解析出的地址，返回第一个连接成功的 (reader, writer, 地址)"""
+        error = None
+        for *_, sockaddr in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(sockaddr[0], port)
+                return reader, writer, sockaddr[0]
+            except OSError as e:
+                error = e
+        raise error
+    
+    def _send_requests(self, writer: asyncio.StreamWriter, host: str, port: int, paths: list):
+        """在已建立的连接上写入一个或多个（管线化）GET请求"""
+        user_agent = self.USER_AGENT
+        writer.write("".join(f"GET {path} HTTP/1.1\r\n"
+                             f"Host: {host}:{port}\r\n"
+                             f"User-Agent: {user_agent}\r\n"
+                             f"Accept: */*\r\n"
+                             f"Connection: keep-alive\r\n\r\n" for path in paths).encode('latin-1'))
+    
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes, bool]:
+        """读取一个HTTP/1.1响应，支持Content-Length、chunked以及读到连接关闭三种方式"""
+        status_line = await reader.readline()
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or not parts[1].isdigit():
+            raise ConnectionError("无效的HTTP响应")
+        status = int(parts[1])
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip().lower()
+        
+        keep_alive = headers.get(b"connection") != b"close" and parts[0] != b"HTTP/1.0"
+        
+        if headers.get(b"transfer-encoding") == b"chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # 跳过trailer
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif b"content-length" in headers:
+            body = await reader.readexactly(int(headers[b"content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        
+        return status, body, keep_alive
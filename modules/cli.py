@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口
+无界面环境下使用与GUI相同的解析和扫描模块，结果以JSONL格式边扫边输出
+
+用法:
+    python -m modules.cli scan --file targets.csv --threads 50 --out results.jsonl
+    python -m modules.cli scan --range 10.0.0.0/16 --port 11434 > results.jsonl
+    python -m modules.cli scan --range 10.0.0.0/8 --journal scan.db --resume --out results.jsonl
+    python -m modules.cli scan --file targets.csv --format excel --out results.xlsx
+    python -m modules.cli query history/*.osr --vulnerable-only --model llama3:8b
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from modules.config_loader import load_config
+from modules.data_parser import DataParser
+from modules.ollama_scanner import create_scanner
+from modules.exporter import ResultExporter
+from modules.scan_stats import ScanStats
+from modules.target_index import TargetIndex
+
+
+# 退出码
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="python -m modules.cli",
+                                     description="Ollama未授权访问扫描（命令行版）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    scan = subparsers.add_parser("scan", help="扫描目标")
+    source = scan.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="目标文件（CSV/JSON/JSONL）")
+    source.add_argument("--range", dest="ip_range", help="IP段，如 10.0.0.0/16 或 192.168.1.1-254")
+    scan.add_argument("--port", type=int, help="IP段扫描的端口，默认取配置文件")
+    scan.add_argument("--threads", type=int, help="并发线程数，默认取配置文件；开启自适应并发时为初始并发数")
+    scan.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=None,
+                      help="是否根据耗时和超时比例自适应调整并发数，默认取配置文件")
+    scan.add_argument("--engine", choices=["threads", "async", "two_phase"], help="扫描引擎，默认取配置文件")
+    scan.add_argument("--timeout", type=float, help="读取超时时间（秒），默认取配置文件")
+    scan.add_argument("--connect-timeout", type=float, help="连接超时时间（秒），默认取配置文件")
+    scan.add_argument("--deadline", type=float, help="单个目标的最长耗时（秒），0表示不限制，默认取配置文件")
+    scan.add_argument("--out", help="结果输出文件，默认输出到标准输出")
+    scan.add_argument("--format", choices=["jsonl", "csv", "json", "excel", "archive"], default="jsonl",
+                      help="输出格式，默认jsonl；除jsonl外需配合 --out 使用")
+    scan.add_argument("--vulnerable-only", action="store_true", help="只输出未授权访问的结果")
+    scan.add_argument("--summary", help="扫描结束后把统计信息写入该JSON文件")
+    scan.add_argument("--journal", help="断点日志文件（SQLite），记录已完成的目标")
+    scan.add_argument("--resume", action="store_true", help="跳过断点日志中已完成的目标继续扫描，需配合 --journal")
+    scan.add_argument("--cache", action=argparse.BooleanOptionalAction, default=None,
+                      help="是否使用结果缓存（有效期内的目标直接返回缓存的结果），默认取配置文件")
+    scan.add_argument("--config", help="配置文件路径，默认 config.yaml")
+    
+    query = subparsers.add_parser("query", help="查询扫描结果归档（.osr）")
+    query.add_argument("archives", nargs="+", help="归档文件")
+    query.add_argument("--vulnerable-only", action="store_true", help="只输出未授权访问的结果")
+    query.add_argument("--model", help="只输出包含该模型的结果")
+    query.add_argument("--version", dest="ollama_version", help="只输出该Ollama版本的结果")
+    query.add_argument("--out", help="结果输出文件，默认以JSONL输出到标准输出")
+    query.add_argument("--format", choices=["jsonl", "csv", "json", "excel", "archive"], default="jsonl",
+                       help="输出格式，默认jsonl；除jsonl外需配合 --out 使用")
+    
+    return parser
+
+
+def load_targets(args):
+    """根据参数解析目标，文件中的目标规范化并去重（IP段本身不会重复）"""
+    if args.file:
+        targets = TargetIndex.build(DataParser.parse_file(args.file))
+        if targets.dropped:
+            print(f"已去除 {targets.dropped} 个重复目标", file=sys.stderr)
+        return targets
+    return DataParser.parse_ip_range(args.ip_range, args.port)
+
+
+def run_scan(args) -> int:
+    """执行扫描子命令，返回退出码"""
+    config = load_config(args.config, create=False)
+    scan_config = dict(config.get("scan", {}))
+    if args.engine:
+        scan_config["engine"] = args.engine
+    if args.timeout:
+        scan_config["read_timeout"] = args.timeout
+    if args.connect_timeout:
+        scan_config["connect_timeout"] = args.connect_timeout
+    if args.deadline is not None:
+        scan_config["target_deadline"] = args.deadline
+    if args.cache is not None:
+        scan_config["cache_enabled"] = args.cache
+    if args.adaptive is not None:
+        scan_config["adaptive_concurrency"] = args.adaptive
+    if args.port is None:
+        args.port = scan_config.get("default_port", 11434)
+    threads = args.threads or scan_config.get("default_threads", 10)
+    
+    try:
+        targets = load_targets(args)
+    except Exception as e:
+        print(f"解析目标失败: {str(e)}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    if not targets:
+        print("没有可扫描的目标", file=sys.stderr)
+        return EXIT_ERROR
+    
+    scanner = None
+    journal = None
+    out = None
+    sink = None
+    try:
+        scanner = create_scanner(scan_config)
+        if args.journal:
+            from modules.scan_journal import ScanJournal, pending_targets
+            journal = ScanJournal(args.journal, scan_config.get("journal_flush_interval", 1))
+            if args.resume:
+                done = journal.done_keys()
+                targets = pending_targets(targets, done)
+                print(f"跳过断点日志中已完成的 {len(done)} 个目标", file=sys.stderr)
+            else:
+                journal.reset()
+        
+        if args.format == "jsonl":
+            # 继续扫描时追加写入结果文件
+            mode = 'a' if args.resume else 'w'
+            out = open(args.out, mode, encoding='utf-8') if args.out else sys.stdout
+        else:
+            # 其他格式不能追加，继续扫描时先写入断点日志中的结果
+            sink = ResultExporter.open_sink(args.out, args.format, args.vulnerable_only)
+            if args.resume:
+                sink.write_many(journal.load_results())
+    except Exception as e:
+        print(f"初始化失败: {str(e)}", file=sys.stderr)
+        if scanner is not None and scanner.cache is not None:
+            scanner.cache.close()
+        if journal is not None:
+            journal.close()
+        if sink is not None:
+            sink.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+        return EXIT_ERROR
+    
+    stats = ScanStats(len(targets))
+    
+    def callback(result, current, total):
+        if journal is not None:
+            journal.record(result)
+        stats.add(result)
+        if sink is not None:
+            sink.write(result)
+            return
+        if args.vulnerable_only and not result.vulnerable:
+            return
+        out.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+        # 发现漏洞时立即刷新，便于管道下游实时处理
+        if result.vulnerable:
+            out.flush()
+    
+    print(f"开始扫描 {len(targets)} 个目标（线程数 {threads}）", file=sys.stderr)
+    close_failed = False
+    try:
+        # 结果都经回调写出，不在内存中保留
+        scanner.scan_batch(targets, threads, callback, collect=False)
+    except KeyboardInterrupt:
+        print("扫描已中断", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except OSError as e:
+        print(f"写入结果失败: {str(e)}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        # 关闭结果缓存时提交缓冲区中的结果
+        if scanner.cache is not None:
+            scanner.cache.close()
+        if journal is not None:
+            journal.close()
+        try:
+            if sink is not None:
+                sink.close()
+            elif out is sys.stdout:
+                out.flush()
+            else:
+                out.close()
+        except OSError as e:
+            # 缓冲的结果在最后刷新或关闭时才写入，磁盘写满等错误常在这里出现
+            print(f"写入结果失败: {str(e)}", file=sys.stderr)
+            close_failed = True
+    if close_failed:
+        return EXIT_ERROR
+    
+    stats.finish()
+    print(f"扫描完成: {stats.summary()}", file=sys.stderr)
+    timing = stats.timing_summary()
+    if timing:
+        print(timing, file=sys.stderr)
+    summary = stats.to_dict()
+    if scanner.cache is not None:
+        cache = scanner.cache
+        print(f"缓存命中: {cache.hits}/{cache.lookups}（{cache.hit_ratio:.1%}）", file=sys.stderr)
+        summary["cache"] = cache.to_dict()
+    if scanner.controller is not None:
+        state = scanner.controller.to_dict()
+        print(f"自适应并发: 结束时 {state['limit']}（{state['minimum']}-{state['maximum']}），"
+              f"减小 {state['decreases']} 次", file=sys.stderr)
+        summary["concurrency"] = state
+    
+    if args.summary and not ResultExporter.export_stats(summary, args.summary):
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+def run_query(args) -> int:
+    """执行归档查询子命令，返回退出码"""
+    from modules.result_archive import ResultArchive
+    
+    try:
+        if args.out:
+            sink = ResultExporter.open_sink(args.out, args.format)
+        else:
+            sink = None
+    except Exception as e:
+        print(f"初始化失败: {str(e)}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    count = 0
+    try:
+        for path in args.archives:
+            archive = ResultArchive(path)
+            for result in archive.load_results(args.vulnerable_only, args.model, args.ollama_version):
+                if sink is not None:
+                    sink.write(result)
+                else:
+                    sys.stdout.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+                count += 1
+    except (ValueError, OSError) as e:
+        print(f"读取归档失败: {str(e)}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if sink is not None:
+            sink.close()
+        else:
+            sys.stdout.flush()
+    
+    print(f"共 {count} 条结果", file=sys.stderr)
+    return EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行主入口"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.command == "scan" and args.resume and not args.journal:
+        parser.error("--resume 需要配合 --journal 使用")
+    if args.format != "jsonl" and not args.out:
+        parser.error(f"--format {args.format} 需要配合 --out 使用")
+    
+    if args.command == "scan":
+        return run_scan(args)
+    if args.command == "query":
+        return run_query(args)
+    
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
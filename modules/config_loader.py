@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+配置加载模块
+GUI与命令行共用的config.yaml读取逻辑
+"""
+
+import os
+import sys
+from typing import Dict, Optional
+
+import yaml
+
+
+DEFAULT_CONFIG = {
+    "scan": {"default_port": 11434, "default_threads": 10, "connect_timeout": 3,
+             "read_timeout": 5, "target_deadline": 10, "pull_timeout": 30,
+             "engine": "threads", "async_concurrency": 500, "queue_factor": 2,
+             "sweep_timeout": 1, "sweep_concurrency": 500, "reuse_connection": True,
+             "pool_maxsize": 10, "retries": 0, "backoff_factor": 0.3, "pipelining": False,
+             "journal_dir": "./result/journal", "journal_flush_interval": 1,
+             "cache_enabled": False, "cache_path": "./result/cache/scan_cache.db",
+             "cache_max_entries": 1000000, "cache_ttl_closed": 86400,
+             "cache_ttl_vulnerable": 3600, "cache_ttl_other": 3600,
+             "adaptive_concurrency": False, "adaptive_min_concurrency": 2,
+             "adaptive_max_concurrency": 200},
+    "export": {"default_path": "./result", "default_format": "csv", "auto_save": False},
+    "gui": {"window_width": 1200, "window_height": 800, "refresh_hz": 10, "max_batch": 5000}
+}
+
+
+def default_config_path() -> str:
+    """默认配置文件路径，打包为exe时位于exe所在目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), "config.yaml")
+    return "config.yaml"
+
+
+def load_config(config_path: Optional[str] = None, create: bool = True) -> Dict:
+    """
+    加载配置文件
+    
+    Args:
+        config_path: 配置文件路径，None表示使用默认路径
+        create: 配置文件不存在时是否写入默认配置
+    
+    Returns:
+        Dict: 配置内容
+    """
+    config_path = config_path or default_config_path()
+    
+    if not os.path.exists(config_path):
+        if create:
+            with open(config_path, 'w', encoding='utf-8') as f:
+                yaml.dump(DEFAULT_CONFIG, f, allow_unicode=True)
+        return DEFAULT_CONFIG
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
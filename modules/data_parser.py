@@ -1,160 +1,484 @@
 # -*- coding: utf-8 -*-
 """
 数据解析模块
-支持CSV和JSON格式的文件解析
+支持CSV、JSON和JSONL格式的文件解析，均为流式读取
 """
 
+import codecs
 import csv
+import io
+import ipaddress
 import json
+import os
 import re
-from typing import List, Tuple, Optional
+import socket
+import struct
+from typing import Callable, Iterator, List, Tuple, Optional
 
+from modules import json_stream
+
+
+# CSV中可能的IP/域名列名和端口列名
+_IP_COLUMN_NAMES = ['ip', 'IP', 'host', 'Host', 'domain', '域名', 'address', '地址', 'target', '目标']
+_PORT_COLUMN_NAMES = ['port', 'Port', 'PORT', '端口']
+# 主机单元格规范化：去掉协议前缀和路径，拆出主机中的端口
+_HOST_PATTERN = re.compile(r'(?:https?://)?([^/:]*)(?::([^/:]*))?')
+# 检测文件编码时读取的文件头大小
+SNIFF_SIZE = 64 * 1024
+# 每解析多少行报告一次进度
+PROGRESS_ROWS = 10000
+# JSON对象中与目标有关的字段
+_JSON_FIELD_KEYS = frozenset(('ip', 'host', 'domain', 'port'))
+# 流式解析JSON时，不超过该字符数的值整体解码后再提取目标
+_JSON_VALUE_LIMIT = 64 * 1024
+# IPv4地址（网络字节序的4个字节）转为整数
+_UNPACK_IPV4 = struct.Struct('!I').unpack
+
+
+class IPRangeTargets:
+    """IP段目标序列，按需生成 (ip, port)，不在内存中展开整个网段"""
+    
+    def __init__(self, first: int, last: int, port: int, version: int = 4):
+        """
+        Args:
+            first: 起始地址（整数形式，包含）
+            last: 结束地址（整数形式，包含）
+            port: 端口号
+            version: IP版本，4 或 6
+        """
+        self.first = first
+        self.last = last
+        self.port = port
+        self.version = version
+    
+    def __len__(self) -> int:
+        return max(self.last - self.first + 1, 0)
+    
+    def __contains__(self, target) -> bool:
+        # 按地址范围判断，不遍历网段
+        try:
+            host, port = target
+            if port != self.port:
+                return False
+            if self.version == 4:
+                value = _UNPACK_IPV4(socket.inet_pton(socket.AF_INET, host))[0]
+            else:
+                value = int(ipaddress.IPv6Address(host))
+        except (TypeError, ValueError, OSError):
+            return False
+        return self.first <= value <= self.last
+    
+    def __iter__(self):
+        port = self.port
+        if self.version == 4:
+            pack = struct.Struct('!I').pack
+            ntoa = socket.inet_ntoa
+            for value in range(self.first, self.last + 1):
+                yield (ntoa(pack(value)), port)
+        else:
+            for value in range(self.first, self.last + 1):
+                yield (str(ipaddress.IPv6Address(value)), port)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("IP段切片不支持步长")
+            return IPRangeTargets(self.first + start, self.first + max(stop, start) - 1,
+                                  self.port, self.version)
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("IP段索引越界")
+        return (str(ipaddress.ip_address(self.first + index)), self.port)
+
+
+class _JsonObject:
+    """流式解析JSON时尚未结束的对象"""
+    
+    __slots__ = ('fields', 'pending', 'results')
+    
+    def __init__(self):
+        # 已读到的 ip/host/domain/port 字段
+        self.fields = {}
+        # 内部嵌套对象中提取到的目标；读到 ip/host/domain 字段后对象本身就是目标，置为None
+        self.pending = []
+        # 是否为带 results 数组的顶层对象
+        self.results = False
 
 
 class DataParser:
     """数据解析器，支持多种格式"""
     
     @staticmethod
-    def parse_file(file_path: str) -> List[Tuple[str, int]]:
+    def parse_file(file_path: str, progress: Optional[Callable] = None) -> List[Tuple[str, int]]:
         """
         解析文件，提取目标列表
-        支持格式：CSV, JSON
+        支持格式：CSV, JSON, JSONL
+        
+        Args:
+            file_path: 文件路径
+            progress: 进度回调 progress(已读取字节数, 文件总字节数)
+        """
+        return list(DataParser.iter_file(file_path, progress))
+    
+    @staticmethod
+    def iter_file(file_path: str, progress: Optional[Callable] = None) -> Iterator[Tuple[str, int]]:
+        """
+        按文件格式返回流式解析的目标迭代器，文件格式不支持时立即抛出异常
+        
+        Args:
+            file_path: 文件路径
+            progress: 进度回调 progress(已读取字节数, 文件总字节数)
+        
+        Returns:
+            Iterator[Tuple[str, int]]: 逐个产出 (host, port)
         """
         file_path_lower = file_path.lower()
         
         if file_path_lower.endswith('.csv'):
-            return DataParser._parse_csv(file_path)
+            return DataParser.iter_csv(file_path, progress)
         elif file_path_lower.endswith('.json'):
-            return DataParser._parse_json(file_path)
+            return DataParser.iter_json(file_path, progress)
+        elif file_path_lower.endswith('.jsonl'):
+            return DataParser.iter_jsonl(file_path, progress)
         else:
-            raise ValueError(f"不支持的文件格式，仅支持 CSV 和 JSON 格式")
+            raise ValueError(f"不支持的文件格式，仅支持 CSV、JSON 和 JSONL 格式")
     
     @staticmethod
-    def _parse_csv(file_path: str) -> List[Tuple[str, int]]:
+    def _parse_csv(file_path: str, progress: Optional[Callable] = None) -> List[Tuple[str, int]]:
         """解析CSV文件 - 按列解析"""
-        targets = []
+        return list(DataParser.iter_csv(file_path, progress))
+    
+    @staticmethod
+    def detect_encoding(file_path: str) -> str:
+        """
+        根据文件头检测编码，不读取整个文件
+        
+        Returns:
+            str: 带BOM时为 utf-8-sig，文件头能按UTF-8解码时为 utf-8，否则为 gbk
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(SNIFF_SIZE)
+        
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
+            # 文件头末尾可能截断了多字节字符，按非最终数据解码
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
         except UnicodeDecodeError:
-            with open(file_path, 'r', encoding='gbk') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-        
-        if not rows:
-            return targets
-        
-        # 查找IP/域名列
-        ip_column = None
-        port_column = None
-        
-        # 可能的列名
-        ip_names = ['ip', 'IP', 'host', 'Host', 'domain', '域名', 'address', '地址', 'target', '目标']
-        port_names = ['port', 'Port', 'PORT', '端口']
-        
-        headers = rows[0].keys()
-        
-        for header in headers:
-            if any(name in header for name in ip_names):
-                ip_column = header
-            if any(name in header for name in port_names):
-                port_column = header
-        
-        # 解析数据
-        for row in rows:
-            if ip_column and ip_column in row:
-                host = row[ip_column].strip()
-                # 移除http://或https://前缀
-                host = host.replace('http://', '').replace('https://', '')
-                # 移除路径部分
-                if '/' in host:
-                    host = host.split('/')[0]
+            return 'gbk'
+    
+    @staticmethod
+    def iter_csv(file_path: str, progress: Optional[Callable] = None) -> Iterator[Tuple[str, int]]:
+        """
+        流式解析CSV文件，逐行产出目标，内存占用与文件大小无关
+        
+        编码按文件头检测，文件头之后出现的无法解码的字节会被替换，不影响ASCII的主机和端口列
+        
+        Args:
+            file_path: 文件路径
+            progress: 进度回调 progress(已读取字节数, 文件总字节数)
+        
+        Yields:
+            Tuple[str, int]: (host, port)
+        """
+        encoding = DataParser.detect_encoding(file_path)
+        total = os.path.getsize(file_path)
+        
+        with io.TextIOWrapper(open(file_path, 'rb'), encoding=encoding,
+                              errors='replace', newline='') as f:
+            raw = f.buffer
+            reader = csv.reader(f)
+            headers = next(reader, None)
+            if headers is None:
+                return
+            
+            # 查找IP/域名列和端口列（同名时取最后一列）
+            ip_index = None
+            port_index = None
+            for index, header in enumerate(headers):
+                if any(name in header for name in _IP_COLUMN_NAMES):
+                    ip_index = index
+                if any(name in header for name in _PORT_COLUMN_NAMES):
+                    port_index = index
+            
+            if ip_index is None:
+                return
+            
+            match = _HOST_PATTERN.match
+            for line_number, row in enumerate(reader, 1):
+                if progress and line_number % PROGRESS_ROWS == 0:
+                    progress(raw.tell(), total)
                 
-                # 获取端口
-                port = 11434  # 默认端口
-                if port_column and port_column in row and row[port_column]:
-                    try:
-                        port = int(row[port_column])
-                    except:
-                        port = 11434
+                if ip_index >= len(row):
+                    continue
+                host, host_port = match(row[ip_index].strip()).groups()
+                if not host:
+                    continue
                 
-                # 如果host中包含端口
-                if ':' in host:
-                    parts = host.split(':')
-                    host = parts[0]
+                # 获取端口，主机中带端口时以主机中的为准
+                port = 11434
+                if port_index is not None and port_index < len(row) and row[port_index]:
+                    try:
+                        port = int(row[port_index])
+                    except ValueError:
+                        pass
+                if host_port:
                     try:
-                        port = int(parts[1])
-                    except:
+                        port = int(host_port)
+                    except ValueError:
                         pass
                 
-                if host:
-                    targets.append((host, port))
+                yield (host, port)
         
-        return targets
+        if progress:
+            progress(total, total)
     
     @staticmethod
-    def _parse_json(file_path: str) -> List[Tuple[str, int]]:
+    def _parse_json(file_path: str, progress: Optional[Callable] = None) -> List[Tuple[str, int]]:
         """解析JSON文件 - 查找results数组"""
-        targets = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 优先查找 results 数组格式: {"results":[{"ip":"xxx","port":"xxx"}]}
-        if isinstance(data, dict) and 'results' in data:
-            results = data['results']
-            if isinstance(results, list):
-                for item in results:
-                    if isinstance(item, dict):
-                        host = item.get('ip') or item.get('host') or item.get('domain')
-                        port = item.get('port', 11434)
-                        
-                        if host:
-                            # 清理host
-                            host = str(host).replace('http://', '').replace('https://', '')
-                            if '/' in host:
-                                host = host.split('/')[0]
-                            if ':' in host and not port:
-                                parts = host.split(':')
-                                host = parts[0]
-                                try:
-                                    port = int(parts[1])
-                                except:
-                                    port = 11434
-                            
-                            try:
-                                port = int(port)
-                            except:
-                                port = 11434
-                            
-                            targets.append((host, port))
-                return targets
-        
-        # 如果不是标准格式，递归提取
-        def extract_from_json(obj):
-            if isinstance(obj, dict):
-                # 尝试提取ip/port对
-                if 'ip' in obj or 'host' in obj or 'domain' in obj:
-                    host = obj.get('ip') or obj.get('host') or obj.get('domain')
-                    port = obj.get('port', 11434)
-                    if host:
-                        host = str(host).replace('http://', '').replace('https://', '')
-                        if '/' in host:
-                            host = host.split('/')[0]
-                        try:
-                            port = int(port)
-                        except:
-                            port = 11434
-                        targets.append((host, port))
+        return list(DataParser.iter_json(file_path, progress))
+    
+    @staticmethod
+    def _parse_jsonl(file_path: str, progress: Optional[Callable] = None) -> List[Tuple[str, int]]:
+        """解析JSONL文件 - 每行一条记录"""
+        return list(DataParser.iter_jsonl(file_path, progress))
+    
+    @staticmethod
+    def _json_port(port) -> int:
+        """把JSON中的端口字段转换为整数，无效时使用默认端口"""
+        try:
+            return int(port)
+        except (TypeError, ValueError, OverflowError):
+            return 11434
+    
+    @staticmethod
+    def _json_host(host) -> str:
+        """清理JSON中的主机字段：去掉协议前缀和路径"""
+        host = str(host).replace('http://', '').replace('https://', '')
+        if '/' in host:
+            host = host.split('/')[0]
+        return host
+    
+    @staticmethod
+    def _result_item_target(item: dict) -> Optional[Tuple[str, int]]:
+        """从 results 数组的一条记录中提取目标，端口为空时取主机中的端口"""
+        host = item.get('ip') or item.get('host') or item.get('domain')
+        if not host:
+            return None
+        
+        port = item.get('port', 11434)
+        host = DataParser._json_host(host)
+        if ':' in host and not port:
+            parts = host.split(':')
+            host = parts[0]
+            port = parts[1]
+        return (host, DataParser._json_port(port))
+    
+    @staticmethod
+    def _object_target(obj: dict) -> Optional[Tuple[str, int]]:
+        """从带有 ip/host/domain 字段的对象中提取目标"""
+        host = obj.get('ip') or obj.get('host') or obj.get('domain')
+        if not host:
+            return None
+        return (DataParser._json_host(host), DataParser._json_port(obj.get('port', 11434)))
+    
+    @staticmethod
+    def _iter_json_value(data) -> Iterator[Tuple[str, int]]:
+        """
+        从已解析的JSON文档中提取目标
+        
+        顶层带 results 数组时只读取该数组，否则按 _iter_nested_targets 查找
+        """
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            for item in data['results']:
+                if isinstance(item, dict):
+                    target = DataParser._result_item_target(item)
+                    if target:
+                        yield target
+            return
+        yield from DataParser._iter_nested_targets(data)
+    
+    @staticmethod
+    def _iter_nested_targets(data) -> Iterator[Tuple[str, int]]:
+        """
+        深度优先查找带 ip/host/domain 字段的对象，找到后不再进入该对象内部
+        
+        使用显式栈，不受递归深度限制
+        """
+        stack = [iter((data,))]
+        while stack:
+            for obj in stack[-1]:
+                if isinstance(obj, dict):
+                    if 'ip' in obj or 'host' in obj or 'domain' in obj:
+                        target = DataParser._object_target(obj)
+                        if target:
+                            yield target
+                    else:
+                        stack.append(iter(obj.values()))
+                        break
+                elif isinstance(obj, list):
+                    stack.append(iter(obj))
+                    break
+            else:
+                stack.pop()
+    
+    @staticmethod
+    def iter_json(file_path: str, progress: Optional[Callable] = None) -> Iterator[Tuple[str, int]]:
+        """
+        流式解析JSON文件，按解析事件提取目标，不把整个文档读入内存
+        
+        提取规则与 _iter_json_value 相同。对象是否为目标要读完整个对象才能确定，
+        因此对象内部嵌套的目标先暂存在该对象上，对象结束时再决定保留还是丢弃；
+        顶层 results 数组和顶层数组中的目标会随读随出
+        
+        Args:
+            file_path: 文件路径
+            progress: 进度回调 progress(已读取字节数, 文件总字节数)
+        
+        Yields:
+            Tuple[str, int]: (host, port)
+        """
+        encoding = DataParser.detect_encoding(file_path)
+        total = os.path.getsize(file_path)
+        
+        with io.TextIOWrapper(open(file_path, 'rb'), encoding=encoding, errors='replace') as f:
+            raw = f.buffer
+            on_chunk = (lambda: progress(raw.tell(), total)) if progress else None
+            events = json_stream.JsonEventReader(f, on_chunk=on_chunk)
+            if not events.peek():
+                raise ValueError("JSON文件为空")
+            yield from DataParser._walk_json(events)
+        
+        if progress:
+            progress(total, total)
+    
+    @staticmethod
+    def _walk_json(events: json_stream.JsonEventReader) -> Iterator[Tuple[str, int]]:
+        """按解析事件提取目标，体积较小的值整体解码后提取"""
+        # 每层容器：对象为 _JsonObject，数组为 None
+        containers = []
+        # 尚未结束的对象
+        objects = []
+        # 下一个事件是否为值的开始（文档开头或对象的键之后；数组中始终是）
+        at_value = True
+        
+        while True:
+            if at_value or (containers and containers[-1] is None):
+                at_value = False
+                ok, data = events.try_read_value(_JSON_VALUE_LIMIT)
+                if ok:
+                    if not containers:
+                        yield from DataParser._iter_json_value(data)
+                    elif objects:
+                        parent = objects[-1].pending
+                        if parent is not None:
+                            parent.extend(DataParser._iter_nested_targets(data))
+                    else:
+                        yield from DataParser._iter_nested_targets(data)
+                    continue
+            
+            event, value = next(events, (None, None))
+            if event is None:
+                return
+            
+            if event == 'map_key':
+                frame = objects[-1]
+                if value == 'results' and len(containers) == 1 and events.peek() == '[':
+                    # 顶层 results 数组：逐条读取记录，忽略顶层对象的其他内容
+                    next(events)
+                    yield from DataParser._walk_results(events)
+                    frame.results = True
+                    frame.pending = None
+                elif value in _JSON_FIELD_KEYS and not (value == 'port' and frame.pending is not None
+                                                        and events.peek() in ('{', '[')):
+                    frame.fields[value] = events.read_value()
+                    if value != 'port':
+                        # 对象本身是目标，不再查找内部嵌套的目标
+                        frame.pending = None
+                elif frame.pending is None:
+                    events.skip_value()
+                else:
+                    if value == 'port':
+                        # 端口是对象或数组时无效，但仍需在其中查找目标
+                        frame.fields['port'] = None
+                    at_value = True
+            elif event == 'start_map':
+                frame = _JsonObject()
+                containers.append(frame)
+                objects.append(frame)
+            elif event == 'start_array':
+                containers.append(None)
+            elif event == 'end_array':
+                containers.pop()
+            elif event == 'end_map':
+                containers.pop()
+                frame = objects.pop()
+                if frame.results:
+                    continue
+                if frame.pending is None:
+                    target = DataParser._object_target(frame.fields)
+                    found = (target,) if target else ()
                 else:
-                    for value in obj.values():
-                        extract_from_json(value)
-            elif isinstance(obj, list):
-                for item in obj:
-                    extract_from_json(item)
-        
-        extract_from_json(data)
-        return targets
+                    found = frame.pending
+                
+                if objects:
+                    parent = objects[-1].pending
+                    if parent is not None:
+                        parent.extend(found)
+                else:
+                    yield from found
+    
+    @staticmethod
+    def _walk_results(events: json_stream.JsonEventReader) -> Iterator[Tuple[str, int]]:
+        """逐条读取 results 数组中的记录"""
+        while True:
+            char = events.peek()
+            if char == '{':
+                target = DataParser._result_item_target(events.read_value())
+                if target:
+                    yield target
+            elif char == ']' or not char:
+                next(events)
+                return
+            else:
+                events.skip_value()
+    
+    @staticmethod
+    def iter_jsonl(file_path: str, progress: Optional[Callable] = None) -> Iterator[Tuple[str, int]]:
+        """
+        流式解析JSONL文件，每行按JSON规则提取目标，无法解析的行（如中断写入的最后一行）直接跳过
+        
+        Args:
+            file_path: 文件路径
+            progress: 进度回调 progress(已读取字节数, 文件总字节数)
+        
+        Yields:
+            Tuple[str, int]: (host, port)
+        """
+        encoding = DataParser.detect_encoding(file_path)
+        total = os.path.getsize(file_path)
+        
+        with io.TextIOWrapper(open(file_path, 'rb'), encoding=encoding, errors='replace') as f:
+            raw = f.buffer
+            for line_number, line in enumerate(f, 1):
+                if progress and line_number % PROGRESS_ROWS == 0:
+                    progress(raw.tell(), total)
+                
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                except (ValueError, RecursionError):
+                    continue
+                yield from DataParser._iter_json_value(data)
+        
+        if progress:
+            progress(total, total)
     
     @staticmethod
     def _extract_target(text: str) -> Optional[Tuple[str, int]]:
@@ -188,41 +512,49 @@ class DataParser:
         return None
     
     @staticmethod
-    def parse_ip_range(ip_range: str, port: int = 11434) -> List[Tuple[str, int]]:
+    def parse_ip_range(ip_range: str, port: int = 11434) -> IPRangeTargets:
         """
-        解析IP段
+        解析IP段，返回按需生成目标的序列（支持len()和迭代）
         支持格式：
         - 192.168.1.1-192.168.1.254
         - 192.168.1.0/24
         - 192.168.1.1
         """
-        targets = []
-        
         # CIDR格式
         if '/' in ip_range:
-            targets = DataParser._parse_cidr(ip_range, port)
+            return DataParser._parse_cidr(ip_range, port)
         # 范围格式
         elif '-' in ip_range:
-            targets = DataParser._parse_range(ip_range, port)
+            return DataParser._parse_range(ip_range, port)
         # 单个IP
         else:
             if DataParser._is_valid_ip(ip_range):
-                targets.append((ip_range, port))
+                value = int(ipaddress.IPv4Address(ip_range))
+                return IPRangeTargets(value, value, port)
         
-        return targets
+        return IPRangeTargets(0, -1, port)
     
     @staticmethod
-    def _parse_cidr(cidr: str, port: int) -> List[Tuple[str, int]]:
-        """解析CIDR格式的IP段"""
+    def _parse_cidr(cidr: str, port: int) -> IPRangeTargets:
+        """解析CIDR格式的IP段，与 network.hosts() 的范围保持一致"""
         try:
-            import ipaddress
             network = ipaddress.ip_network(cidr, strict=False)
-            return [(str(ip), port) for ip in network.hosts()]
         except Exception:
-            return []
+            return IPRangeTargets(0, -1, port)
+        
+        first = int(network.network_address)
+        last = int(network.broadcast_address)
+        
+        # /31、/32（IPv6为/127、/128）包含全部地址，其余去掉网络地址（IPv4还去掉广播地址）
+        if network.num_addresses > 2:
+            first += 1
+            if network.version == 4:
+                last -= 1
+        
+        return IPRangeTargets(first, last, port, network.version)
     
     @staticmethod
-    def _parse_range(ip_range: str, port: int) -> List[Tuple[str, int]]:
+    def _parse_range(ip_range: str, port: int) -> IPRangeTargets:
         """解析IP范围格式"""
         try:
             start_ip, end_ip = ip_range.split('-')
@@ -234,19 +566,12 @@ class DataParser:
                 parts = start_ip.split('.')
                 end_ip = '.'.join(parts[:3]) + '.' + end_ip
             
-            import ipaddress
             start = ipaddress.IPv4Address(start_ip)
             end = ipaddress.IPv4Address(end_ip)
             
-            targets = []
-            current = start
-            while current <= end:
-                targets.append((str(current), port))
-                current += 1
-            
-            return targets
+            return IPRangeTargets(int(start), int(end), port)
         except Exception:
-            return []
+            return IPRangeTargets(0, -1, port)
     
     @staticmethod
     def _is_valid_ip(ip: str) -> bool:
@@ -1,17 +1,245 @@
 # -*- coding: utf-8 -*-
 """
 结果导出模块
-支持导出为CSV, JSON, Excel格式
+支持导出为CSV, JSON, JSONL, Excel格式，既可一次性导出，也可在扫描过程中逐条写入
 """
 
 import csv
 import json
 import os
+from abc import ABC, abstractmethod
 from typing import List
 
-import openpyxl
-from openpyxl.styles import Font, PatternFill
 
+# 导出字段，与 ScanResult.to_dict() 的键一致（*_ns 为各探测阶段耗时，单位纳秒）
+FIELDNAMES = ["host", "port", "url", "vulnerable", "version", "models", "error", "timestamp",
+              "dns_ns", "connect_ns", "version_ns", "tags_ns", "total_ns"]
+
+
+class ResultSink(ABC):
+    """增量导出基类，扫描过程中逐条写入结果，每写入一批刷新到磁盘；子类缺少任一抽象方法时无法创建"""
+    
+    extension = ""
+    
+    def __init__(self, file_path: str, vulnerable_only: bool = False, batch_size: int = 1000):
+        """
+        创建导出文件
+        
+        Args:
+            file_path: 导出文件路径，缺少扩展名时自动补全
+            vulnerable_only: 是否只写入有漏洞的结果
+            batch_size: 每写入多少条刷新一次
+        """
+        if not file_path.endswith(self.extension):
+            file_path += self.extension
+        
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.file_path = file_path
+        self.vulnerable_only = vulnerable_only
+        self.batch_size = max(batch_size, 1)
+        self.count = 0
+        self._open()
+    
+    def write(self, result):
+        """
+        写入一个结果
+        
+        Args:
+            result: ScanResult 或 to_dict() 格式的字典
+        """
+        if isinstance(result, dict):
+            if self.vulnerable_only and not result.get("vulnerable", False):
+                return
+            row = result
+        else:
+            if self.vulnerable_only and not result.vulnerable:
+                return
+            row = result.to_dict()
+        
+        self._write_row(row)
+        self.count += 1
+        if self.count % self.batch_size == 0:
+            self.flush()
+    
+    def write_many(self, results):
+        """逐条写入多个结果，不会复制结果列表"""
+        for result in results:
+            self.write(result)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @abstractmethod
+    def _open(self):
+        """创建导出文件并写入文件头"""
+    
+    @abstractmethod
+    def _write_row(self, row: dict):
+        """写入一行结果"""
+    
+    def flush(self):
+        """把已写入的结果刷新到磁盘"""
+    
+    @abstractmethod
+    def close(self):
+        """写入文件尾并关闭文件"""
+
+
+class _TextSink(ResultSink):
+    """文本格式导出的公共部分"""
+    
+    encoding = "utf-8"
+    
+    def _open(self):
+        self._file = open(self.file_path, 'w', newline='', encoding=self.encoding)
+    
+    def flush(self):
+        self._file.flush()
+    
+    def close(self):
+        self._file.close()
+
+
+class CsvSink(_TextSink):
+    """CSV增量导出"""
+    
+    extension = ".csv"
+    encoding = "utf-8-sig"
+    
+    def _open(self):
+        super()._open()
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction='ignore')
+        self._writer.writeheader()
+    
+    def _write_row(self, row: dict):
+        self._writer.writerow(row)
+
+
+class JsonlSink(_TextSink):
+    """JSONL增量导出，每行一个结果"""
+    
+    extension = ".jsonl"
+    
+    def _write_row(self, row: dict):
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class JsonSink(_TextSink):
+    """JSON数组增量导出，输出格式与 json.dump(indent=2) 相同"""
+    
+    extension = ".json"
+    
+    def _open(self):
+        super()._open()
+        self._file.write("[")
+    
+    def _write_row(self, row: dict):
+        text = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        self._file.write(("," if self.count else "") + "\n  " + text)
+    
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        super().close()
+
+
+class ExcelSink(ResultSink):
+    """
+    Excel增量导出，使用openpyxl只写模式，行数据直接写入临时文件，不在内存中保留单元格
+    
+    只写模式下列宽必须在写入第一行之前设置，因此每个工作表先缓存前 batch_size 行，
+    写入时顺带统计各列最大宽度，再设置列宽并写出；之后的行直接写出。
+    超过单个工作表的行数上限时自动新建工作表。
+    """
+    
+    extension = ".xlsx"
+    
+    # 单个工作表的行数上限（含表头）
+    MAX_ROWS = 1048576
+    # 列宽上限
+    MAX_WIDTH = 50
+    
+    def _open(self):
+        # openpyxl导入较慢，只在导出Excel时才导入
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill
+        
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        self._header_font = Font(bold=True, color="FFFFFF")
+        self._sheet = None
+        self._sheet_count = 0
+        self._sheet_rows = 0
+        self._widths = None
+        self._pending = None
+    
+    def _new_sheet(self):
+        """写出上一个工作表的缓存行，并新建工作表"""
+        if self._pending is not None:
+            self._write_pending()
+        
+        self._sheet_count += 1
+        title = "扫描结果" if self._sheet_count == 1 else f"扫描结果{self._sheet_count}"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet_rows = 1
+        self._widths = [len(field) for field in FIELDNAMES]
+        self._pending = []
+    
+    def _write_row(self, row: dict):
+        if self._sheet is None or self._sheet_rows >= self.MAX_ROWS:
+            self._new_sheet()
+        
+        values = [row.get(field, "") for field in FIELDNAMES]
+        self._sheet_rows += 1
+        
+        if self._pending is None:
+            self._sheet.append(values)
+            return
+        
+        widths = self._widths
+        for index, value in enumerate(values):
+            length = len(str(value))
+            if length > widths[index]:
+                widths[index] = length
+        self._pending.append(values)
+    
+    def _write_pending(self):
+        """按统计的宽度设置列宽，然后写出表头和缓存的行"""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+        
+        sheet = self._sheet
+        for index, width in enumerate(self._widths, start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = min(width + 2, self.MAX_WIDTH)
+        
+        header = []
+        for field in FIELDNAMES:
+            cell = WriteOnlyCell(sheet, value=field)
+            cell.fill = self._header_fill
+            cell.font = self._header_font
+            header.append(cell)
+        sheet.append(header)
+        
+        for values in self._pending:
+            sheet.append(values)
+        self._pending = None
+    
+    def flush(self):
+        if self._pending is not None:
+            self._write_pending()
+    
+    def close(self):
+        # 没有结果时也输出只含表头的工作表
+        if self._sheet is None:
+            self._new_sheet()
+        self.flush()
+        self._workbook.save(self.file_path)
+        self._workbook.close()
 
 
 class ResultExporter:
@@ -26,7 +254,7 @@ class ResultExporter:
             results: 结果列表，每个元素为字典
             file_path: 导出文件路径
             format_type: 导出格式 (csv, json, excel)
-            
+        
         Returns:
             bool: 是否成功
         """
@@ -86,53 +314,65 @@ class ResultExporter:
     
     @staticmethod
     def _export_excel(results: List[dict], file_path: str) -> bool:
-        """导出为Excel格式"""
+        """导出为Excel格式（只写模式逐行写入，超过行数上限时分多个工作表）"""
         if not results:
             return False
         
-        # 确保文件扩展名正确
-        if not file_path.endswith('.xlsx'):
-            file_path += '.xlsx'
+        with ExcelSink(file_path) as sink:
+            sink.write_many(results)
         
-        # 创建工作簿
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "扫描结果"
+        return True
+    
+    @staticmethod
+    def open_sink(file_path: str, format_type: str = "csv", vulnerable_only: bool = False,
+                  batch_size: int = 1000) -> ResultSink:
+        """
+        创建增量导出器，可在扫描过程中逐条写入，也可用于流式导出已有结果
         
-        # 获取所有字段
-        fieldnames = list(results[0].keys())
+        Args:
+            file_path: 导出文件路径
+            format_type: 导出格式 (csv, json, jsonl, excel, archive)
+            vulnerable_only: 是否只写入有漏洞的结果
+            batch_size: 每写入多少条刷新一次
         
-        # 写入表头
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        
-        for col_idx, field in enumerate(fieldnames, start=1):
-            cell = sheet.cell(row=1, column=col_idx, value=field)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        # 写入数据
-        for row_idx, result in enumerate(results, start=2):
-            for col_idx, field in enumerate(fieldnames, start=1):
-                sheet.cell(row=row_idx, column=col_idx, value=result.get(field, ""))
-        
-        # 自动调整列宽
-        for column in sheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            sheet.column_dimensions[column_letter].width = adjusted_width
-        
-        workbook.save(file_path)
-        workbook.close()
+        Returns:
+            ResultSink: 增量导出器，使用完毕后需调用 close()
+        """
+        if format_type.lower() in ("archive", "osr"):
+            # 归档格式依赖扫描结果类，按需导入
+            from modules.result_archive import ArchiveSink
+            return ArchiveSink(file_path, vulnerable_only, batch_size)
         
-        return True
+        sinks = {"csv": CsvSink, "json": JsonSink, "jsonl": JsonlSink,
+                 "excel": ExcelSink, "xlsx": ExcelSink}
+        sink_class = sinks.get(format_type.lower())
+        if sink_class is None:
+            raise ValueError(f"不支持的导出格式: {format_type}")
+        return sink_class(file_path, vulnerable_only, batch_size)
+    
+    @staticmethod
+    def export_stats(stats: dict, file_path: str) -> bool:
+        """
+        导出扫描统计（ScanStats.to_dict()）为JSON
+        
+        Args:
+            stats: 统计字典
+            file_path: 导出文件路径
+        
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"导出统计失败: {str(e)}")
+            return False
     
     @staticmethod
     def filter_results(results: List[dict], start: int = 0, 
@@ -145,7 +385,7 @@ class ResultExporter:
             start: 起始索引（从0开始）
             count: 导出数量，None表示全部
             vulnerable_only: 是否只导出有漏洞的结果
-            
+        
         Returns:
             List[dict]: 过滤后的结果
         """
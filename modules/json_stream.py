@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+流式JSON解析模块
+按块读取文本并逐个产出解析事件（类似ijson），不把整个文档读入内存，嵌套层数不受递归深度限制
+
+事件:
+    ("start_map", None) / ("end_map", None)      对象开始/结束
+    ("start_array", None) / ("end_array", None)  数组开始/结束
+    ("map_key", 键名)                            对象的键
+    ("value", 值)                                字符串、数字、true/false/null
+
+体积较小的值（如results数组中的单条记录）可以用 read_value/skip_value 整体读取或跳过，
+这时直接在缓冲区上调用标准库的 JSONDecoder.raw_decode，比逐个事件处理快得多
+"""
+
+import json
+import re
+from typing import Callable, Iterator, Optional, Tuple
+
+
+# 每次读取的字符数
+CHUNK_SIZE = 64 * 1024
+# read_value/skip_value 整体解码的最大字符数，超过时改为逐个事件处理，保证内存占用有上限
+VALUE_LIMIT = 1024 * 1024
+# 整体解码因嵌套过深失败后，其内部这么多层以内不再尝试整体解码
+DEEP_SKIP = 512
+
+# 逗号和冒号只作为分隔符跳过
+_TOKEN = re.compile(r'''[\s,:]*(?:
+    (?P<string>"[^"\\]*(?:\\.[^"\\]*)*")
+  | (?P<punct>[{}\[\]])
+  | (?P<number>-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<literal>true|false|null)
+)''', re.VERBOSE)
+_SEPARATORS = re.compile(r'[\s,:]*')
+# 数字后面直到缓冲区末尾都是数字字符时，数字可能被读取边界截断（如 "2." 与 "5"）
+_NUMBER_TAIL = re.compile(r'[\d.eE+-]*\Z')
+_LITERALS = {"true": True, "false": False, "null": None}
+_DECODER = json.JSONDecoder()
+
+
+class JsonEventReader:
+    """
+    流式JSON事件读取器，迭代产出 (事件类型, 值)
+    
+    不校验逗号和冒号的位置；对象中的字符串按是否紧跟在 { 或逗号之后区分键和值
+    """
+    
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE, on_chunk: Optional[Callable] = None):
+        """
+        Args:
+            f: 文本模式打开的文件对象
+            chunk_size: 每次读取的字符数
+            on_chunk: 每读取一块后调用，可用于报告进度
+        """
+        self._file = f
+        self._chunk_size = chunk_size
+        self._on_chunk = on_chunk
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        # 容器栈，True 表示对象，False 表示数组
+        self._containers = []
+        self._expect_key = False
+        # 不尝试整体解码的容器层数范围 [起始, 结束)
+        self._deep = (0, 0)
+        self._fill()
+    
+    def _fill(self) -> bool:
+        """读取下一块，丢弃缓冲区中已处理的部分"""
+        chunk = self._file.read(self._chunk_size)
+        if self._on_chunk:
+            self._on_chunk()
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+    
+    def _skip_separators(self) -> int:
+        """跳过空白、逗号和冒号，返回下一个有效字符的位置（文件已读完时为缓冲区长度）"""
+        while True:
+            match = _SEPARATORS.match(self._buffer, self._position)
+            if "," in match.group() and self._containers:
+                self._expect_key = self._containers[-1]
+            self._position = match.end()
+            if self._position < len(self._buffer) or not self._fill():
+                return self._position
+    
+    def peek(self) -> str:
+        """
+        查看下一个事件的首字符，不消耗该事件
+        
+        Returns:
+            str: 首字符，文件已读完时为空字符串
+        """
+        position = self._skip_separators()
+        return self._buffer[position:position + 1]
+    
+    def __iter__(self) -> "JsonEventReader":
+        return self
+    
+    def __next__(self) -> Tuple[str, object]:
+        while True:
+            match = _TOKEN.match(self._buffer, self._position)
+            # 词法单元可能跨越两次读取的边界：匹配失败、匹配到缓冲区末尾或数字可能被截断时先读入下一块
+            if not self._eof and (match is None or match.end() == len(self._buffer)
+                                  or (match.lastgroup == "number"
+                                      and _NUMBER_TAIL.match(self._buffer, match.end()))):
+                self._fill()
+                continue
+            break
+        
+        if match is None:
+            position = self._skip_separators()
+            if position < len(self._buffer):
+                raise ValueError(f"JSON格式错误: {self._buffer[position:position + 30]!r}")
+            if self._containers:
+                raise ValueError("JSON格式错误: 文件提前结束")
+            raise StopIteration
+        
+        kind = match.lastgroup
+        if "," in self._buffer[self._position:match.start(kind)] and self._containers:
+            self._expect_key = self._containers[-1]
+        self._position = match.end()
+        text = match.group(kind)
+        
+        if kind == "string":
+            value = json.loads(text) if "\\" in text else text[1:-1]
+            if self._expect_key:
+                self._expect_key = False
+                return "map_key", value
+            return "value", value
+        if kind == "punct":
+            if text == "{":
+                self._containers.append(True)
+                self._expect_key = True
+                return "start_map", None
+            if text == "[":
+                self._containers.append(False)
+                return "start_array", None
+            if not self._containers:
+                raise ValueError(f"JSON格式错误: 多余的 {text}")
+            self._expect_key = False
+            return ("end_map" if self._containers.pop() else "end_array"), None
+        if kind == "number":
+            if "." in text or "e" in text or "E" in text:
+                return "value", float(text)
+            return "value", int(text)
+        return "value", _LITERALS[text]
+    
+    def try_read_value(self, limit: int = VALUE_LIMIT) -> tuple:
+        """
+        在缓冲区上直接解码下一个对象、数组或字符串（在对象的键之后或数组的元素位置调用）
+        
+        Args:
+            limit: 整体解码的最大字符数
+        
+        Returns:
+            tuple: (是否成功, 值)；下一个值是数字或字面量、超过 limit、嵌套过深或格式错误时返回失败，不消耗该值
+        """
+        start = self._skip_separators()
+        if self._buffer[start:start + 1] not in ('{', '[', '"'):
+            return False, None
+        depth = len(self._containers)
+        if self._deep[0] <= depth < self._deep[1]:
+            return False, None
+        
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._position)
+            except RecursionError:
+                # 嵌套层数超过解释器的递归深度限制，改为逐个事件处理，内部各层也不再逐层重试
+                self._deep = (depth, depth + DEEP_SKIP)
+                return False, None
+            except ValueError:
+                # 值可能跨越读取边界，继续读取直到解码成功或超过上限
+                if len(self._buffer) - self._position >= limit or not self._fill():
+                    return False, None
+                continue
+            self._position = end
+            return True, value
+    
+    def read_value(self, limit: int = VALUE_LIMIT):
+        """
+        读取下一个完整的值（在对象的键之后或数组的元素位置调用）
+        
+        Args:
+            limit: 整体解码的最大字符数，超过时逐个事件构建
+        
+        Returns:
+            构建出的Python对象
+        """
+        ok, value = self.try_read_value(limit)
+        if ok:
+            return value
+        event, value = next(self)
+        return build_value(event, value, self)
+    
+    def skip_value(self, limit: int = VALUE_LIMIT):
+        """跳过下一个值（包括其中嵌套的全部内容）"""
+        ok, _ = self.try_read_value(limit)
+        if ok:
+            return
+        
+        event, _ = next(self)
+        if event != "start_map" and event != "start_array":
+            return
+        depth = 1
+        for event, _ in self:
+            if event == "start_map" or event == "start_array":
+                depth += 1
+            elif event == "end_map" or event == "end_array":
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+def build_value(event: str, value, events: Iterator[Tuple[str, object]]):
+    """
+    从当前事件开始逐个事件构建一个完整的值
+    
+    Args:
+        event: 当前事件类型
+        value: 当前事件的值
+        events: 事件迭代器，构建完成后停在该值的结束事件之后
+    
+    Returns:
+        构建出的Python对象
+    """
+    if event == "value":
+        return value
+    if event not in ("start_map", "start_array"):
+        raise ValueError(f"JSON格式错误: 意外的 {event}")
+    
+    root = {} if event == "start_map" else []
+    stack = [root]
+    keys = [None]
+    for event, value in events:
+        if event == "map_key":
+            keys[-1] = value
+            continue
+        if event == "end_map" or event == "end_array":
+            stack.pop()
+            keys.pop()
+            if not stack:
+                return root
+            continue
+        
+        if event == "start_map":
+            item = {}
+        elif event == "start_array":
+            item = []
+        else:
+            item = value
+        
+        container = stack[-1]
+        if isinstance(container, dict):
+            container[keys[-1]] = item
+        else:
+            container.append(item)
+        
+        if event != "value":
+            stack.append(item)
+            keys.append(None)
+    
+    raise ValueError("JSON格式错误: 文件提前结束")
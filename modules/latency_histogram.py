@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+耗时直方图模块
+HDR风格的对数-线性分桶直方图：每个2的幂区间再均分为若干子桶，相对误差固定（默认不超过1/64），
+记录一个值只需一次位运算和一次列表自增，内存只与取值范围有关，与记录的次数无关
+"""
+
+import struct
+from typing import Dict, Optional
+
+from modules.ollama_scanner import PHASES, TIMINGS
+
+
+# 各阶段的显示名称
+PHASE_LABELS = {"dns": "DNS解析", "connect": "TCP连接", "version": "/api/version",
+                "tags": "/api/tags", "total": "总耗时"}
+# 汇总的分位数
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """耗时直方图（单位纳秒），分位数按所在子桶的中点估计"""
+    
+    def __init__(self, precision: int = 7):
+        """
+        Args:
+            precision: 子桶精度（位），每个2的幂区间分为 2^(precision-1) 个子桶
+        """
+        self.precision = precision
+        self._linear = 1 << precision
+        self._half = 1 << (precision - 1)
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+    
+    def _index(self, value: int) -> int:
+        """值所在的桶下标，小于 2^precision 的值每个值一个桶"""
+        if value < self._linear:
+            return value
+        shift = value.bit_length() - self.precision
+        return ((shift + 1) << (self.precision - 1)) + (value >> shift) - self._half
+    
+    def _value(self, index: int) -> int:
+        """桶的代表值（子桶中点）"""
+        if index < self._linear:
+            return index
+        shift = (index >> (self.precision - 1)) - 1
+        sub = (index & (self._half - 1)) + self._half
+        return (sub << shift) + ((1 << shift) >> 1)
+    
+    def record(self, value: int):
+        """记录一个值（纳秒，负数忽略）"""
+        if value < 0:
+            return
+        index = self._index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+    
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个精度相同的直方图"""
+        if other.precision != self.precision:
+            raise ValueError("直方图精度不同，无法合并")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+    
+    def percentile(self, percent: float) -> Optional[int]:
+        """
+        估计分位数
+        
+        Args:
+            percent: 百分位（0~100）
+        
+        Returns:
+            Optional[int]: 分位数（纳秒），没有记录时返回None
+        """
+        if not self.count:
+            return None
+        rank = max(int(self.count * percent / 100 + 0.5), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                # 估计值不超出实际记录的范围
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict:
+        """汇总（纳秒）"""
+        summary = {"count": self.count, "min": self.min, "max": self.max,
+                   "mean": self.total // self.count if self.count else None}
+        for percent in PERCENTILES:
+            summary[f"p{percent}"] = self.percentile(percent)
+        return summary
+
+
+class PhaseHistograms:
+    """按探测阶段分别统计的耗时直方图"""
+    
+    def __init__(self):
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+        self._unpack = struct.Struct(TIMINGS).unpack
+    
+    def record(self, timings: bytes):
+        """
+        记录一个结果的各阶段耗时
+        
+        Args:
+            timings: ScanResult.timings（打包的各阶段纳秒数，未执行的阶段为-1）
+        """
+        for histogram, value in zip(self.histograms.values(), self._unpack(timings)):
+            histogram.record(value)
+    
+    def to_dict(self) -> Dict:
+        """各阶段的汇总（纳秒），没有记录的阶段不输出"""
+        return {phase: histogram.to_dict()
+                for phase, histogram in self.histograms.items() if histogram.count}
+    
+    def summary(self) -> str:
+        """一行文字摘要，各阶段的 p50/p95/p99（毫秒）"""
+        parts = []
+        for phase, histogram in self.histograms.items():
+            if not histogram.count:
+                continue
+            values = "/".join(f"{histogram.percentile(percent) / 1e6:.1f}" for percent in PERCENTILES)
+            parts.append(f"{PHASE_LABELS[phase]} {values}")
+        if not parts:
+            return ""
+        return "耗时 p50/p95/p99（毫秒）: " + "，".join(parts)
@@ -4,29 +4,99 @@ Ollama扫描模块
 用于检测Ollama服务的未授权访问漏洞
 """
 
+import functools
+import http.client
 import socket
-import requests
+import json
+import struct
+import sys
+import threading
+from contextlib import nullcontext
 from typing import Dict, Optional, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
 
+# 所有未命中结果共用的空模型列表
+_NO_MODELS = ()
+
+# 探测阶段：DNS解析、TCP连接、/api/version、/api/tags，以及整个探测的总耗时
+PHASES = ("dns", "connect", "version", "tags", "total")
+PHASE_DNS, PHASE_CONNECT, PHASE_VERSION, PHASE_TAGS = range(4)
+# 各阶段耗时（纳秒）打包为定长字节串保存在结果上，未执行的阶段为-1
+TIMINGS = "<5q"
+_PACK_TIMINGS = struct.Struct(TIMINGS).pack
+_UNPACK_TIMINGS = struct.Struct(TIMINGS).unpack
+
+
+class PhaseTimer:
+    """
+    记录一次探测各阶段的耗时（纳秒），阶段失败时记录到失败为止的耗时；
+    同时保存整个探测的截止时间，各阶段的超时不超过剩余时间
+    """
+    
+    __slots__ = ("start", "last", "values", "deadline")
+    
+    def __init__(self, budget: Optional[float] = None):
+        """
+        Args:
+            budget: 整个探测最多耗时多少秒，None表示不限制
+        """
+        self.start = self.last = time.perf_counter_ns()
+        self.values = [-1, -1, -1, -1]
+        self.deadline = None if budget is None else self.start + int(budget * 1e9)
+    
+    def mark(self, phase: int):
+        """结束一个阶段，耗时从上一个阶段结束时算起（同一阶段执行多次时累加，如服务端关闭连接后重连）"""
+        now = time.perf_counter_ns()
+        self.values[phase] = max(self.values[phase], 0) + now - self.last
+        self.last = now
+    
+    def budget(self, timeout: float) -> float:
+        """
+        某个操作可用的超时时间: timeout 与截止前剩余时间中较小的一个
+        
+        Raises:
+            socket.timeout: 已到截止时间
+        """
+        if self.deadline is None:
+            return timeout
+        remaining = (self.deadline - time.perf_counter_ns()) / 1e9
+        if remaining <= 0:
+            raise socket.timeout("超过单个目标的截止时间")
+        return min(timeout, remaining)
+    
+    def pack(self) -> bytes:
+        """打包各阶段耗时和总耗时"""
+        return _PACK_TIMINGS(*self.values, time.perf_counter_ns() - self.start)
+
+
 class ScanResult:
-    """扫描结果类"""
+    """扫描结果类（使用__slots__，百万级结果时节省内存）"""
+    
+    __slots__ = ("host", "port", "vulnerable", "version", "models", "error", "created", "timings")
     
     def __init__(self, host: str, port: int, vulnerable: bool, 
                  version: str = "", models: list = None, error: str = ""):
         self.host = host
         self.port = port
         self.vulnerable = vulnerable
-        self.version = version
-        self.models = models or []
-        self.error = error
-        self.timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        # 版本号和错误信息重复度很高，驻留后所有结果共用同一个字符串对象
+        self.version = sys.intern(version) if isinstance(version, str) else version
+        # 没有模型时共用同一个空元组，只有命中的结果才保存模型列表
+        self.models = models if models else _NO_MODELS
+        self.error = sys.intern(error)
+        self.created = time.time()
+        # 各阶段耗时（打包的纳秒数），断点日志、缓存中读出的结果没有耗时
+        self.timings = None
+    
+    @property
+    def timestamp(self) -> str:
+        """扫描时间（按需格式化）"""
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
     
     def to_dict(self) -> Dict:
-        """转换为字典"""
-        return {
+        """转换为字典，各阶段耗时为 <阶段>_ns 字段（未执行的阶段为空字符串）"""
+        row = {
             "host": self.host,
             "port": self.port,
             "url": f"http://{self.host}:{self.port}",
@@ -36,23 +106,253 @@ class ScanResult:
             "error": self.error,
             "timestamp": self.timestamp
         }
+        timings = _UNPACK_TIMINGS(self.timings) if self.timings is not None else (-1,) * len(PHASES)
+        for phase, value in zip(PHASES, timings):
+            row[f"{phase}_ns"] = value if value >= 0 else ""
+        return row
+
+
+class _CacheMisses:
+    """目标序列中未命中缓存的部分，迭代时把命中缓存的结果直接交给回调，不复制目标列表"""
+    
+    def __init__(self, targets, cache, report: Callable, stop_flag: Optional[Callable]):
+        """
+        Args:
+            targets: 原始目标序列 [(host, port), ...]
+            cache: 结果缓存（ResultCache）
+            report: 命中缓存时调用 report(result)
+            stop_flag: 停止标志函数，连续命中缓存时也能及时停止
+        """
+        self.targets = targets
+        self.cache = cache
+        self.report = report
+        self.stop_flag = stop_flag
+        # 已命中缓存的目标数
+        self.hits = 0
+    
+    def __len__(self) -> int:
+        # 命中数在迭代前未知，按原始目标数计算（扫描引擎只用来确定并发数）
+        return len(self.targets)
+    
+    def __iter__(self):
+        get = self.cache.get
+        for host, port in self.targets:
+            result = get(host, port)
+            if result is None:
+                yield host, port
+                continue
+            if self.stop_flag and self.stop_flag():
+                return
+            self.hits += 1
+            self.report(result)
+
+
+def serve_from_cache(scan_batch: Callable) -> Callable:
+    """
+    scan_batch 的装饰器：扫描器设置了结果缓存时，命中缓存的目标直接返回缓存的结果，
+    只把未命中的目标交给扫描引擎，扫描得到的结果写入缓存
+    
+    各扫描引擎都在调用回调的线程中迭代目标，缓存的读写因此都在同一个线程中进行；
+    回调的 current、total 按包括命中缓存在内的全部目标计算
+    """
+    @functools.wraps(scan_batch)
+    def wrapper(self, targets, threads: int = 10, callback: Optional[Callable] = None,
+                stop_flag: Optional[Callable] = None, collect: bool = True, **kwargs) -> list:
+        cache = self.cache
+        if cache is None:
+            return scan_batch(self, targets, threads, callback, stop_flag, collect, **kwargs)
+        
+        total = len(targets)
+        current = 0
+        results = []
+        
+        def report(result):
+            nonlocal current
+            current += 1
+            if collect:
+                results.append(result)
+            if callback:
+                callback(result, current, total)
+        
+        def store(result, _current, _total):
+            cache.put(result)
+            report(result)
+        
+        misses = _CacheMisses(targets, cache, report, stop_flag)
+        sweep_callback = kwargs.get("sweep_callback")
+        if sweep_callback:
+            # 命中缓存的目标不经过端口探测，计入已探测的数量
+            kwargs["sweep_callback"] = lambda swept, _total, open_count: sweep_callback(
+                swept + misses.hits, total, open_count)
+        
+        # 结果由 report 按完成顺序收集，扫描引擎不再重复保存
+        try:
+            scan_batch(self, misses, threads, store, stop_flag, False, **kwargs)
+        finally:
+            cache.evict()
+        return results
+    
+    return wrapper
+
+
+class _DeadlineSocket(socket.socket):
+    """每次读取前把超时设为读取超时与截止前剩余时间中较小的一个，逐字节慢速返回的目标也无法拖过截止时间"""
+    
+    __slots__ = ("timer", "read_timeout")
+    
+    def recv(self, *args):
+        self.settimeout(self.timer.budget(self.read_timeout))
+        return super().recv(*args)
+    
+    def recv_into(self, *args):
+        self.settimeout(self.timer.budget(self.read_timeout))
+        return super().recv_into(*args)
+
+
+class _SharedResponseStream:
+    """HTTP管线化时多个HTTPResponse共用的socket读取流，单个响应读完时不关闭底层流"""
+    
+    def __init__(self, sock: socket.socket):
+        self._fp = sock.makefile("rb")
+    
+    def makefile(self, *args, **kwargs):
+        return self
+    
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+    
+    def close(self):
+        pass
+    
+    def release(self):
+        """所有响应读取完毕后关闭读取流"""
+        self._fp.close()
 
 
 class OllamaScanner:
     """Ollama扫描器"""
     
-    def __init__(self, timeout: int = 5):
+    # 等待任务完成时检查停止标志的间隔（秒）
+    POLL_INTERVAL = 0.2
+    # 所有HTTP请求使用的User-Agent
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    # 解析主机名的线程数（所有扫描器共用），解析卡住时占用的是解析线程而不是扫描线程
+    RESOLVER_THREADS = 16
+    _resolver = None
+    _resolver_lock = threading.Lock()
+    
+    def __init__(self, timeout: int = 5, queue_factor: int = 2, reuse_connection: bool = True,
+                 pool_maxsize: int = 10, retries: int = 0, backoff_factor: float = 0.0,
+                 pipelining: bool = False, cache=None, adaptive_bounds: Optional[tuple] = None,
+                 connect_timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 pull_timeout: float = 30):
         """
         初始化扫描器
         
         Args:
-            timeout: 连接超时时间（秒）
+            timeout: 读取超时时间（秒），等待响应数据时两次收到数据之间的最长间隔
+            queue_factor: 批量扫描时每个线程最多排队的任务数
+            reuse_connection: 端口检测与HTTP探测是否共用同一个TCP连接
+            pool_maxsize: 每个主机的连接池大小，批量扫描时会自动扩大到线程数
+            retries: 连接失败或遇到502/503/504时的重试次数
+            backoff_factor: 重试退避系数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+            pipelining: 复用连接时是否以HTTP管线化方式同时发出版本和模型列表请求
+            cache: 结果缓存（ResultCache），None表示不使用缓存
+            adaptive_bounds: 自适应并发的 (下限, 上限)，None表示按固定的线程数扫描
+            connect_timeout: 连接超时时间（秒），DNS解析和TCP连接分别受此限制，None表示与 timeout 相同
+            deadline: 单个目标（或单条命令）从开始到结束的最长耗时（秒），None表示不限制；
+                每个扫描线程被一个目标占用的时间不超过该值
+            pull_timeout: pull 命令的读取超时时间（秒），拉取模型的耗时不受 deadline 限制
         """
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.connect_timeout = timeout if connect_timeout is None else connect_timeout
+        self.deadline = deadline
+        self.pull_timeout = pull_timeout
+        self.cache = cache
+        self.adaptive_bounds = adaptive_bounds
+        # 当前批量扫描的并发控制器，界面线程可读取其并发数和变化记录
+        self.controller = None
+        self.queue_factor = max(queue_factor, 1)
+        self.reuse_connection = reuse_connection
+        self.pipelining = pipelining
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.adapter = None
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """requests会话，首次使用时才导入requests并创建（复用连接的扫描路径不需要requests）"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    session.headers.update({'User-Agent': self.USER_AGENT})
+                    self._mount(session)
+                    self._session = session
+        return self._session
+    
+    def _new_controller(self, initial: int):
+        """
+        开启自适应并发时为本次批量扫描创建并发控制器
+        
+        Args:
+            initial: 初始并发数
+        
+        Returns:
+            AdaptiveConcurrency: 并发控制器，未开启时返回None
+        """
+        if self.adaptive_bounds is None:
+            self.controller = None
+        else:
+            from modules.adaptive_concurrency import AdaptiveConcurrency
+            self.controller = AdaptiveConcurrency(initial, *self.adaptive_bounds)
+        return self.controller
+    
+    def _timed_out(self, result: ScanResult, latency: float) -> bool:
+        """探测是否超时（连接或读取超时，或耗时达到读取超时）"""
+        return result.error == "连接超时" or latency >= self.timeout
+    
+    def _mount_adapter(self, pool_maxsize: int):
+        """调整连接池大小，session已创建时重新挂载连接池"""
+        self.pool_maxsize = pool_maxsize
+        if self._session is not None:
+            self._mount(self._session)
+    
+    def _mount(self, session):
+        """
+        为session挂载指定大小的连接池（requests.Session可被多个线程共享使用），
+        替换已有的连接池时沿用其复用统计并关闭其中的连接
+        """
+        from urllib3.util.retry import Retry
+        from modules.pool_adapter import PoolStatsAdapter
+        
+        previous = self.adapter
+        self.adapter = PoolStatsAdapter(
+            pool_connections=self.pool_maxsize,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=Retry(total=self.retries, backoff_factor=self.backoff_factor,
+                              status_forcelist=(502, 503, 504), raise_on_status=False)
+        )
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        if previous is not None:
+            self.adapter.inherit(previous)
+            previous.close()
+    
+    def pool_stats(self) -> Dict:
+        """
+        获取连接池复用统计
+        
+        Returns:
+            Dict: requests 请求数, new_connections 新建连接数, reused 复用连接数
+        """
+        if self.adapter is None:
+            return {"requests": 0, "new_connections": 0, "reused": 0}
+        return self.adapter.pool_stats()
     
     def scan_single(self, host: str, port: int) -> ScanResult:
         """
@@ -63,19 +363,64 @@ class OllamaScanner:
             port: 端口号
             
         Returns:
-            ScanResult: 扫描结果
+            ScanResult: 扫描结果（timings 中记录各阶段耗时）
         """
-        # 先检查端口是否开放
-        if not self._check_port(host, port):
+        return self._timed(self._scan_phases, host, port)
+    
+    def _timed(self, probe: Callable, host: str, port: int) -> ScanResult:
+        """执行探测 probe(host, port, timer)，在结果上记录各阶段耗时"""
+        timer = PhaseTimer(self.deadline)
+        result = probe(host, port, timer)
+        result.timings = timer.pack()
+        return result
+    
+    def _scan_phases(self, host: str, port: int, timer: PhaseTimer) -> ScanResult:
+        """scan_single 的各阶段"""
+        if self.reuse_connection:
+            # 建立连接即端口检测，后续HTTP请求复用该连接
+            return self._probe_connection(host, port, timer)
+        
+        # 先检查端口是否开放，连接超时单独记录（可能是并发过高引起的拥塞，不当作端口未开放）
+        try:
+            self._connect(host, port, timer).close()
+        except socket.timeout:
+            return ScanResult(host, port, False, error="连接超时")
+        except Exception:
             return ScanResult(host, port, False, error="端口未开放")
         
+        return self._verify_http(host, port, timer)
+    
+    def _verify_http(self, host: str, port: int, timer: PhaseTimer) -> ScanResult:
+        """
+        通过HTTP接口验证已开放端口是否为未授权的Ollama服务
+        
+        Args:
+            host: 主机地址
+            port: 端口号
+            timer: 阶段计时（不复用连接时，requests自行建立的连接计入 version、tags 阶段）
+            
+        Returns:
+            ScanResult: 扫描结果
+        
+        不复用连接时每个请求的连接超时和每次读取的超时都不超过截止前的剩余时间，请求在截止时间前结束
+        """
+        if self.reuse_connection:
+            return self._probe_connection(host, port, timer, connect_error="连接失败")
+        
+        session = self.session
+        from modules.pool_adapter import deadline
+        
         # 检查是否为Ollama服务
         try:
             url = f"http://{host}:{port}"
             
             # 获取版本信息
             version_url = f"{url}/api/version"
-            response = self.session.get(version_url, timeout=self.timeout)
+            try:
+                with deadline(timer, self.timeout):
+                    response = session.get(version_url, timeout=self._request_timeout(timer))
+            finally:
+                timer.mark(PHASE_VERSION)
             
             if response.status_code != 200:
                 return ScanResult(host, port, False, error="非Ollama服务")
@@ -85,7 +430,11 @@ class OllamaScanner:
             
             # 尝试获取模型列表（验证未授权访问）
             tags_url = f"{url}/api/tags"
-            tags_response = self.session.get(tags_url, timeout=self.timeout)
+            try:
+                with deadline(timer, self.timeout):
+                    tags_response = session.get(tags_url, timeout=self._request_timeout(timer))
+            finally:
+                timer.mark(PHASE_TAGS)
             
             if tags_response.status_code == 200:
                 tags_data = tags_response.json()
@@ -98,44 +447,239 @@ class OllamaScanner:
                 return ScanResult(host, port, False, version=version, 
                                 error=f"无法访问API (状态码: {tags_response.status_code})")
         
-        except requests.exceptions.Timeout:
-            return ScanResult(host, port, False, error="连接超时")
-        except requests.exceptions.ConnectionError:
-            return ScanResult(host, port, False, error="连接失败")
         except Exception as e:
-            return ScanResult(host, port, False, error=f"扫描错误: {str(e)}")
+            return ScanResult(host, port, False, error=self._request_error(e) or f"扫描错误: {str(e)}")
+    
+    @staticmethod
+    def _request_error(error: Exception) -> Optional[str]:
+        """
+        把requests请求的超时和连接错误转换为错误信息，不暴露连接池等内部细节
+        
+        Args:
+            error: 请求时抛出的异常
+            
+        Returns:
+            Optional[str]: "连接超时" 或 "连接失败"，其他异常返回None
+        """
+        import requests
+        from urllib3.exceptions import ReadTimeoutError
+        
+        if isinstance(error, (requests.exceptions.Timeout, socket.timeout)):
+            return "连接超时"
+        if isinstance(error, requests.exceptions.ConnectionError):
+            # 重试次数用尽（MaxRetryError）或读取响应体时的读取超时，requests也抛出 ConnectionError
+            reason = error.args[0] if error.args else None
+            if isinstance(getattr(reason, "reason", reason), ReadTimeoutError):
+                return "连接超时"
+            return "连接失败"
+        return None
+    
+    def _request_timeout(self, timer: PhaseTimer) -> tuple:
+        """requests的 (连接超时, 读取超时)，不超过截止前的剩余时间"""
+        return timer.budget(self.connect_timeout), timer.budget(self.timeout)
     
-    def _check_port(self, host: str, port: int) -> bool:
+    def _probe_connection(self, host: str, port: int, timer: PhaseTimer,
+                          connect_error: str = "端口未开放") -> ScanResult:
         """
-        检查端口是否开放
+        在同一个TCP连接上完成端口检测、版本获取和模型列表获取，每个目标只需一次握手
         
         Args:
             host: 主机地址
             port: 端口号
+            timer: 阶段计时
+            connect_error: 连接建立失败（超时除外）时记录的错误信息
             
         Returns:
-            bool: 端口是否开放
+            ScanResult: 扫描结果
         """
+        conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        # 建立连接（包括服务端关闭连接后http.client自动重连）都经过 _connect：
+        # 先单独解析地址再连接，分别计时并受截止时间约束；Host请求头仍使用原始主机名
+        conn._create_connection = lambda *args: self._connect(host, port, timer)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            result = sock.connect_ex((host, port))
-            sock.close()
-            return result == 0
-        except Exception:
-            return False
+            try:
+                conn.connect()
+            except socket.timeout:
+                return ScanResult(host, port, False, error="连接超时")
+            except Exception:
+                return ScanResult(host, port, False, error=connect_error)
+            
+            # 获取版本信息，管线化时模型列表请求随版本请求一起发出，省去一次往返
+            if self.pipelining:
+                responses = self._conn_get_pipelined(conn, ["/api/version", "/api/tags"], timer)
+            else:
+                try:
+                    responses = [self._conn_get(conn, "/api/version")]
+                finally:
+                    timer.mark(PHASE_VERSION)
+            status, body = responses[0]
+            
+            if status != 200:
+                return ScanResult(host, port, False, error="非Ollama服务")
+            
+            version = json.loads(body).get("version", "Unknown")
+            
+            # 尝试获取模型列表（验证未授权访问），服务端关闭连接时http.client会自动重连
+            if len(responses) > 1:
+                status, body = responses[1]
+            else:
+                try:
+                    status, body = self._conn_get(conn, "/api/tags")
+                finally:
+                    timer.mark(PHASE_TAGS)
+            
+            if status == 200:
+                tags_data = json.loads(body)
+                models = []
+                if "models" in tags_data:
+                    models = [model.get("name", "") for model in tags_data["models"]]
+                
+                return ScanResult(host, port, True, version=version, models=models)
+            else:
+                return ScanResult(host, port, False, version=version, 
+                                error=f"无法访问API (状态码: {status})")
+        
+        except socket.timeout:
+            return ScanResult(host, port, False, error="连接超时")
+        except (OSError, http.client.HTTPException):
+            return ScanResult(host, port, False, error="连接失败")
+        except Exception as e:
+            return ScanResult(host, port, False, error=f"扫描错误: {str(e)}")
+        finally:
+            conn.close()
+    
+    def _conn_get(self, conn: http.client.HTTPConnection, path: str):
+        """在已建立的连接上发送GET请求，返回 (状态码, 响应体)"""
+        conn.request("GET", path, headers={'User-Agent': self.USER_AGENT})
+        response = conn.getresponse()
+        return response.status, response.read()
+    
+    def _conn_get_pipelined(self, conn: http.client.HTTPConnection, paths: list,
+                            timer: PhaseTimer) -> list:
+        """
+        HTTP/1.1管线化：在同一连接上一次性发出多个GET请求，再按顺序读取响应
+        
+        服务端在中途关闭连接时，剩余的路径改为重新连接后逐个请求；
+        第i个响应读取完毕时结束第 PHASE_VERSION+i 个阶段（paths 依次为版本、模型列表）
+        
+        Returns:
+            list: [(状态码, 响应体), ...]，顺序与 paths 一致
+        """
+        request_headers = (f"Host: {conn.host}:{conn.port}\r\n"
+                           f"User-Agent: {self.USER_AGENT}\r\n"
+                           f"Accept: */*\r\n\r\n")
+        conn.sock.sendall("".join(f"GET {path} HTTP/1.1\r\n{request_headers}" 
+                                  for path in paths).encode("latin-1"))
+        
+        stream = _SharedResponseStream(conn.sock)
+        responses = []
+        try:
+            for _ in paths:
+                response = http.client.HTTPResponse(stream, method="GET")
+                response.begin()
+                responses.append((response.status, response.read()))
+                timer.mark(PHASE_VERSION + len(responses) - 1)
+                if response.will_close:
+                    break
+        finally:
+            stream.release()
+        
+        if len(responses) < len(paths):
+            conn.close()
+            for path in paths[len(responses):]:
+                responses.append(self._conn_get(conn, path))
+                timer.mark(PHASE_VERSION + len(responses) - 1)
+        
+        return responses
+    
+    def _connect(self, host: str, port: int, timer: PhaseTimer) -> socket.socket:
+        """
+        解析地址并建立TCP连接，DNS解析和TCP连接分别计时（失败时记录到失败为止的耗时），
+        与 socket.create_connection 一样依次尝试解析出的每个地址
+        
+        Returns:
+            socket.socket: 已连接的socket，之后的每次读取都受读取超时和截止时间约束
+        
+        Raises:
+            OSError: 解析或连接失败（超时为 socket.timeout）
+        """
+        try:
+            addresses = self._resolve(host, port, timer)
+        finally:
+            timer.mark(PHASE_DNS)
+        
+        try:
+            error = None
+            for family, _, _, _, address in addresses:
+                sock = _DeadlineSocket(family, socket.SOCK_STREAM)
+                sock.timer = timer
+                sock.read_timeout = self.timeout
+                try:
+                    sock.settimeout(timer.budget(self.connect_timeout))
+                    sock.connect(address)
+                    return sock
+                except OSError as e:
+                    sock.close()
+                    error = e
+            raise error
+        finally:
+            timer.mark(PHASE_CONNECT)
+    
+    def _resolve(self, host: str, port: int, timer: PhaseTimer) -> list:
+        """
+        解析地址，IP地址直接转换；主机名交给解析线程，最多等待连接超时（getaddrinfo本身不能设置超时）
+        
+        Raises:
+            OSError: 解析失败（超时为 socket.timeout）
+        """
+        addresses = self._numeric_address(host, port)
+        if addresses is not None:
+            return addresses
+        
+        from concurrent.futures import TimeoutError as FutureTimeout
+        
+        future = self._resolver_pool().submit(socket.getaddrinfo, host, port, type=socket.SOCK_STREAM)
+        try:
+            return future.result(timeout=timer.budget(self.connect_timeout))
+        except FutureTimeout:
+            future.cancel()
+            raise socket.timeout("DNS解析超时")
+    
+    @staticmethod
+    def _numeric_address(host: str, port: int) -> Optional[list]:
+        """host 为IP地址时返回 getaddrinfo 的结果（不查询DNS），否则返回None"""
+        try:
+            return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)
+        except socket.gaierror:
+            return None
+    
+    @classmethod
+    def _resolver_pool(cls) -> "ThreadPoolExecutor":
+        """所有扫描器共用的解析线程池，首次解析主机名时创建"""
+        if OllamaScanner._resolver is None:
+            with OllamaScanner._resolver_lock:
+                if OllamaScanner._resolver is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    OllamaScanner._resolver = ThreadPoolExecutor(
+                        max_workers=cls.RESOLVER_THREADS, thread_name_prefix="resolver")
+        return OllamaScanner._resolver
     
-    def scan_batch(self, targets: list, threads: int = 10, 
+    @serve_from_cache
+    def scan_batch(self, targets, threads: int = 10, 
                    callback: Optional[Callable] = None,
-                   stop_flag: Optional[Callable] = None) -> list:
+                   stop_flag: Optional[Callable] = None, collect: bool = True) -> list:
         """
         批量扫描目标
         
+        目标按需从迭代器中取出，同一时刻最多只有 threads*queue_factor 个任务在排队，
+        每完成一个就补充一个，内存占用与目标总数无关；开启自适应并发时进行中的任务数由并发控制器决定
+        
         Args:
-            targets: 目标列表 [(host, port), ...]
-            threads: 并发线程数
+            targets: 目标序列 [(host, port), ...]，支持列表或 IPRangeTargets 等可迭代且支持len()的对象
+            threads: 并发线程数（开启自适应并发时为初始并发数）
             callback: 回调函数，每完成一个目标时调用 callback(result, current, total)
             stop_flag: 停止标志函数，返回True时停止扫描
+            collect: 是否保存并返回全部结果；为False时结果只交给回调，返回空列表，内存占用与目标数无关
             
         Returns:
             list: 扫描结果列表
@@ -143,40 +687,72 @@ class OllamaScanner:
         results = []
         total = len(targets)
         current = 0
+        iterator = iter(targets)
+        window = threads * self.queue_factor
         
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            # 提交所有任务
-            future_to_target = {
-                executor.submit(self.scan_single, host, port): (host, port)
-                for host, port in targets
-            }
-            
-            # 处理完成的任务
-            for future in as_completed(future_to_target):
+        # 自适应并发时按上限创建线程，任务不排队，进行中的任务数即并发数
+        controller = self._new_controller(threads)
+        if controller is not None:
+            threads = controller.maximum
+        
+        # 连接池至少与线程数一样大，避免连接被丢弃
+        if self.pool_maxsize < threads:
+            self._mount_adapter(threads)
+        
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        executor = ThreadPoolExecutor(max_workers=threads)
+        pending = {}
+        started = {}
+        exhausted = False
+        
+        try:
+            while True:
+                if controller is not None:
+                    window = controller.limit
+                
+                # 补充任务直到窗口填满
+                while not exhausted and len(pending) < window:
+                    target = next(iterator, None)
+                    if target is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(self.scan_single, *target)
+                    pending[future] = target
+                    if controller is not None:
+                        started[future] = time.monotonic()
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                
                 # 检查停止标志
                 if stop_flag and stop_flag():
-                    # 取消所有未完成的任务
-                    for f in future_to_target:
-                        f.cancel()
                     break
                 
-                try:
-                    result = future.result()
-                    results.append(result)
-                    current += 1
+                # 处理完成的任务
+                for future in done:
+                    host, port = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = ScanResult(host, port, False, error=f"扫描异常: {str(e)}")
                     
-                    # 调用回调函数
-                    if callback:
-                        callback(result, current, total)
-                
-                except Exception as e:
-                    host, port = future_to_target[future]
-                    result = ScanResult(host, port, False, error=f"扫描异常: {str(e)}")
-                    results.append(result)
+                    if controller is not None:
+                        latency = time.monotonic() - started.pop(future)
+                        controller.record(latency, self._timed_out(result, latency))
+                    
+                    if collect:
+                        results.append(result)
                     current += 1
                     
+                    # 调用回调函数
                     if callback:
                         callback(result, current, total)
+        finally:
+            # 取消排队中的任务，不等待正在执行的探测（它们会在超时时间内自行结束）
+            executor.shutdown(wait=False, cancel_futures=True)
         
         return results
     
@@ -193,65 +769,128 @@ class OllamaScanner:
             
         Returns:
             Dict: 执行结果
+        
+        除 pull 外每条命令在 deadline 内结束；pull 的读取超时为 pull_timeout
         """
+        from modules.pool_adapter import deadline
+        
         url = f"http://{host}:{port}"
+        timer = PhaseTimer(self.deadline)
+        timeout = self._request_timeout(timer)
+        # pull 的耗时不受 deadline 限制，其他命令从连接到读完响应都不超过 deadline
+        limit = nullcontext() if command == "pull" else deadline(timer, self.timeout)
         
         try:
-            if command == "list":
-                response = self.session.get(f"{url}/api/tags", timeout=self.timeout)
-                if response.status_code == 200:
-                    data = response.json()
-                    return {"success": True, "data": data.get("models", [])}
-                else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
-            
-            elif command == "version":
-                response = self.session.get(f"{url}/api/version", timeout=self.timeout)
-                if response.status_code == 200:
-                    return {"success": True, "data": response.json()}
-                else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
-            
-            elif command == "ps":
-                response = self.session.get(f"{url}/api/ps", timeout=self.timeout)
-                if response.status_code == 200:
-                    data = response.json()
-                    return {"success": True, "data": data.get("models", [])}
-                else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
-            
-            elif command == "show" and model_name:
-                payload = {"name": model_name}
-                response = self.session.post(f"{url}/api/show", 
-                                           json=payload, timeout=self.timeout)
-                if response.status_code == 200:
-                    return {"success": True, "data": response.json()}
-                else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
-            
-            elif command == "pull" and model_name:
-                payload = {"name": model_name}
-                response = self.session.post(f"{url}/api/pull", 
-                                           json=payload, timeout=30)
-                if response.status_code == 200:
-                    return {"success": True, "data": "模型拉取请求已发送"}
-                else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
-            
-            elif command == "rm" and model_name:
-                payload = {"name": model_name}
-                response = self.session.delete(f"{url}/api/delete", 
-                                             json=payload, timeout=self.timeout)
-                if response.status_code == 200:
-                    return {"success": True, "data": "模型已删除"}
+            with limit:
+                if command == "list":
+                    response = self.session.get(f"{url}/api/tags", timeout=timeout)
+                    if response.status_code == 200:
+                        data = response.json()
+                        return {"success": True, "data": data.get("models", [])}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "version":
+                    response = self.session.get(f"{url}/api/version", timeout=timeout)
+                    if response.status_code == 200:
+                        return {"success": True, "data": response.json()}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "ps":
+                    response = self.session.get(f"{url}/api/ps", timeout=timeout)
+                    if response.status_code == 200:
+                        data = response.json()
+                        return {"success": True, "data": data.get("models", [])}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "show" and model_name:
+                    payload = {"name": model_name}
+                    response = self.session.post(f"{url}/api/show", 
+                                               json=payload, timeout=timeout)
+                    if response.status_code == 200:
+                        return {"success": True, "data": response.json()}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "pull" and model_name:
+                    payload = {"name": model_name}
+                    response = self.session.post(f"{url}/api/pull", 
+                                               json=payload, timeout=(self.connect_timeout, self.pull_timeout))
+                    if response.status_code == 200:
+                        return {"success": True, "data": "模型拉取请求已发送"}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "rm" and model_name:
+                    payload = {"name": model_name}
+                    response = self.session.delete(f"{url}/api/delete", 
+                                                 json=payload, timeout=timeout)
+                    if response.status_code == 200:
+                        return {"success": True, "data": "模型已删除"}
+                    else:
+                        return {"success": False, "error": f"状态码: {response.status_code}"}
+                
+                elif command == "chat" and model_name:
+                    return {"success": False, "error": "chat命令需要在GUI中交互使用"}
+                
                 else:
-                    return {"success": False, "error": f"状态码: {response.status_code}"}
+                    return {"success": False, "error": "无效的命令或缺少参数"}
             
-            elif command == "chat" and model_name:
-                return {"success": False, "error": "chat命令需要在GUI中交互使用"}
-            
-            else:
-                return {"success": False, "error": "无效的命令或缺少参数"}
-        
         except Exception as e:
-            return {"success": False, "error": str(e)}
+            # 截止时间和连接池的错误与扫描时一样报告为连接超时/连接失败
+            return {"success": False, "error": self._request_error(e) or str(e)}
+
+
+def create_scanner(scan_config: Dict) -> OllamaScanner:
+    """
+    根据配置创建扫描器
+    
+    Args:
+        scan_config: config.yaml 中的 scan 配置段，engine 可选 threads、async 或 two_phase，
+            cache_enabled 为真时批量扫描优先使用结果缓存，adaptive_concurrency 为真时自适应调整并发数，
+            target_deadline 不大于0时不限制单个目标的总耗时
+        
+    Returns:
+        OllamaScanner: 扫描器实例
+    """
+    # 旧配置文件只有 timeout 一项，连接和读取超时都取该值
+    timeout = scan_config.get("read_timeout", scan_config.get("timeout", 5))
+    deadline = scan_config.get("target_deadline", 0)
+    engine = scan_config.get("engine", "threads")
+    options = {
+        "connect_timeout": scan_config.get("connect_timeout", scan_config.get("timeout", 5)),
+        "deadline": deadline if deadline and deadline > 0 else None,
+        "pull_timeout": scan_config.get("pull_timeout", 30),
+        "queue_factor": scan_config.get("queue_factor", 2),
+        "reuse_connection": scan_config.get("reuse_connection", True),
+        "pool_maxsize": scan_config.get("pool_maxsize", 10),
+        "retries": scan_config.get("retries", 0),
+        "backoff_factor": scan_config.get("backoff_factor", 0.0),
+        "pipelining": scan_config.get("pipelining", False),
+    }
+    
+    if scan_config.get("adaptive_concurrency", False):
+        options["adaptive_bounds"] = (scan_config.get("adaptive_min_concurrency", 2),
+                                      scan_config.get("adaptive_max_concurrency", 200))
+    if scan_config.get("cache_enabled", False):
+        from modules.result_cache import ResultCache
+        options["cache"] = ResultCache.from_config(scan_config)
+    
+    if engine == "async":
+        from modules.async_scanner import AsyncOllamaScanner
+        concurrency = scan_config.get("async_concurrency", 500)
+        if "adaptive_bounds" in options:
+            # 异步引擎的并发上限取 async_concurrency，adaptive_max_concurrency 只用于线程引擎
+            options["adaptive_bounds"] = (options["adaptive_bounds"][0], concurrency)
+        return AsyncOllamaScanner(timeout=timeout, concurrency=concurrency, **options)
+    elif engine == "two_phase":
+        from modules.port_sweeper import PortSweeper, TwoPhaseScanner
+        sweeper = PortSweeper(connect_timeout=scan_config.get("sweep_timeout", 1),
+                              max_inflight=scan_config.get("sweep_concurrency", 500))
+        return TwoPhaseScanner(sweeper, timeout=timeout, **options)
+    elif engine == "threads":
+        return OllamaScanner(timeout=timeout, **options)
+    else:
+        raise ValueError(f"不支持的扫描引擎: {engine}")
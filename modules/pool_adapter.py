@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+连接池统计模块
+requests连接池适配器，统计连接复用情况，并让请求受单个目标的截止时间约束；
+依赖requests，只在首次发送requests请求时导入
+"""
+
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+
+# 当前线程正在发送的请求的 (阶段计时, 读取超时)，None表示不限制
+_limits = threading.local()
+
+
+@contextmanager
+def deadline(timer, read_timeout: float):
+    """
+    在此范围内当前线程通过 PoolStatsAdapter 发出的请求，每次读取的超时不超过截止前的剩余时间，
+    逐字节慢速返回响应头或响应体的目标也无法把请求拖过截止时间
+    
+    Args:
+        timer: PhaseTimer，提供截止时间
+        read_timeout: 读取超时时间（秒）
+    """
+    _limits.current = (timer, read_timeout)
+    try:
+        yield
+    finally:
+        _limits.current = None
+
+
+class _PooledSocket(socket.socket):
+    """连接池中的socket：每次读取前按当前线程的截止时间调整超时（连接可能被不同目标的请求复用）"""
+    
+    __slots__ = ()
+    
+    def _arm(self):
+        limit = getattr(_limits, "current", None)
+        if limit is not None:
+            timer, read_timeout = limit
+            self.settimeout(timer.budget(read_timeout))
+    
+    def recv(self, *args):
+        self._arm()
+        return super().recv(*args)
+    
+    def recv_into(self, *args):
+        self._arm()
+        return super().recv_into(*args)
+
+
+class _DeadlineConnection(HTTPConnection):
+    """新建的socket换成 _PooledSocket"""
+    
+    def _new_conn(self):
+        sock = super()._new_conn()
+        timeout = sock.gettimeout()
+        sock = _PooledSocket(sock.family, sock.type, sock.proto, fileno=sock.detach())
+        sock.settimeout(timeout)
+        return sock
+
+
+class _DeadlineConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _DeadlineConnection
+
+
+class PoolStatsAdapter(HTTPAdapter):
+    """带连接池复用统计的HTTPAdapter，http连接的读取受 deadline() 设置的截止时间约束"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {**self.poolmanager.pool_classes_by_scheme,
+                                                   "http": _DeadlineConnectionPool}
+        self._stats_lock = threading.Lock()
+        self._evicted_requests = 0
+        self._evicted_connections = 0
+        
+        # 连接池被淘汰时先累计其统计数据
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+        
+        def on_dispose(pool):
+            with self._stats_lock:
+                self._evicted_requests += pool.num_requests
+                self._evicted_connections += pool.num_connections
+            if dispose:
+                dispose(pool)
+        
+        pools.dispose_func = on_dispose
+    
+    def inherit(self, previous: "PoolStatsAdapter"):
+        """
+        累计被替换的适配器的统计数据，重新挂载连接池后统计不清零
+        
+        Args:
+            previous: 被替换的适配器
+        """
+        stats = previous.pool_stats()
+        with self._stats_lock:
+            self._evicted_requests += stats["requests"]
+            self._evicted_connections += stats["new_connections"]
+    
+    def pool_stats(self) -> Dict:
+        """
+        统计连接池使用情况
+        
+        Returns:
+            Dict: requests 请求数, new_connections 新建连接数（未命中）, reused 复用连接数（命中）
+        """
+        pools = self.poolmanager.pools
+        with self._stats_lock:
+            total_requests = self._evicted_requests
+            total_connections = self._evicted_connections
+        
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total_requests += pool.num_requests
+                total_connections += pool.num_connections
+        
+        return {
+            "requests": total_requests,
+            "new_connections": total_connections,
+            "reused": max(total_requests - total_connections, 0),
+        }
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+两阶段扫描模块
+第一阶段用非阻塞socket + selectors批量探测端口，第二阶段只对开放端口进行HTTP验证
+"""
+
+import errno
+import selectors
+import socket
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, Optional, Callable, Tuple
+
+from modules.ollama_scanner import OllamaScanner, ScanResult, serve_from_cache
+
+
+# 非阻塞connect正在进行中的错误码（Windows为WSAEWOULDBLOCK）
+_CONNECT_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
+
+
+class PortSweeper:
+    """端口快速探测器，单线程内用selectors（Linux下为epoll）同时维持大量连接"""
+    
+    # 有主机名在解析时等待连接事件的最长间隔（秒）
+    RESOLVE_POLL_INTERVAL = 0.01
+    
+    def __init__(self, connect_timeout: float = 1, max_inflight: int = 500):
+        """
+        初始化探测器
+        
+        Args:
+            connect_timeout: 单个连接的超时时间（秒）
+            max_inflight: 同时进行中的连接数上限
+        """
+        self.connect_timeout = connect_timeout
+        self.max_inflight = max_inflight
+    
+    def sweep(self, targets, stop_flag: Optional[Callable] = None) -> Iterator[Tuple[str, int, bool]]:
+        """
+        探测目标端口，按完成顺序逐个产出结果
+        
+        IP地址直接发起非阻塞连接；主机名交给扫描器共用的解析线程池，解析结果返回后再发起连接，
+        解析最多等待 connect_timeout，不会阻塞其他进行中的连接
+        
+        Args:
+            targets: 目标序列 [(host, port), ...]
+            stop_flag: 停止标志函数，返回True时停止探测
+        
+        Yields:
+            Tuple[str, int, bool]: (host, port, 端口是否开放)
+        """
+        selector = selectors.DefaultSelector()
+        iterator = iter(targets)
+        inflight = {}
+        deadlines = deque()
+        # 解析中的主机名 {future: 目标}、解析超时时间队列、已解析完成的future（由解析线程追加）
+        resolving = {}
+        resolve_deadlines = deque()
+        resolved = deque()
+        exhausted = False
+        
+        def connect(host, port, addresses):
+            """发起连接，已得出结果时返回端口是否开放，否则返回None"""
+            sock = self._start_connect(addresses)
+            if isinstance(sock, bool):
+                return sock
+            inflight[sock] = (host, port)
+            deadlines.append((time.monotonic() + self.connect_timeout, sock))
+            selector.register(sock, selectors.EVENT_WRITE)
+            return None
+        
+        try:
+            while True:
+                if stop_flag and stop_flag():
+                    return
+                
+                # 补充新连接
+                while not exhausted and len(inflight) + len(resolving) < self.max_inflight:
+                    target = next(iterator, None)
+                    if target is None:
+                        exhausted = True
+                        break
+                    
+                    host, port = target
+                    addresses = OllamaScanner._numeric_address(host, port)
+                    if addresses is None:
+                        future = OllamaScanner._resolver_pool().submit(
+                            socket.getaddrinfo, host, port, type=socket.SOCK_STREAM)
+                        resolving[future] = target
+                        resolve_deadlines.append((time.monotonic() + self.connect_timeout, future))
+                        future.add_done_callback(resolved.append)
+                        continue
+                    
+                    is_open = connect(host, port, addresses)
+                    if is_open is not None:
+                        yield host, port, is_open
+                
+                if not inflight and not resolving:
+                    return
+                
+                # 等待连接完成，最长等到最早的连接超时；有主机名在解析时缩短等待，及时发起连接
+                now = time.monotonic()
+                wait_time = OllamaScanner.POLL_INTERVAL
+                if deadlines:
+                    wait_time = min(max(deadlines[0][0] - now, 0), wait_time)
+                if resolving:
+                    wait_time = min(max(resolve_deadlines[0][0] - now, 0), self.RESOLVE_POLL_INTERVAL)
+                if inflight:
+                    events = selector.select(wait_time)
+                else:
+                    # 没有注册的socket时Windows下的select会报错
+                    time.sleep(wait_time)
+                    events = ()
+                for key, _ in events:
+                    sock = key.fileobj
+                    host, port = inflight.pop(sock)
+                    error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    selector.unregister(sock)
+                    sock.close()
+                    yield host, port, error == 0
+                
+                # 处理超时的连接（超时时间相同，队首即最早）
+                now = time.monotonic()
+                while deadlines and (deadlines[0][0] <= now or deadlines[0][1] not in inflight):
+                    _, sock = deadlines.popleft()
+                    target = inflight.pop(sock, None)
+                    if target is None:
+                        continue
+                    selector.unregister(sock)
+                    sock.close()
+                    yield target[0], target[1], False
+                
+                # 解析完成的主机名发起连接，解析失败记为端口未开放
+                while resolved:
+                    future = resolved.popleft()
+                    target = resolving.pop(future, None)
+                    if target is None:
+                        continue
+                    try:
+                        addresses = future.result()
+                    except Exception:
+                        yield target[0], target[1], False
+                        continue
+                    is_open = connect(target[0], target[1], addresses)
+                    if is_open is not None:
+                        yield target[0], target[1], is_open
+                
+                # 解析超时的主机名（解析线程中的查询无法中断，结果返回后忽略）
+                while resolve_deadlines and (resolve_deadlines[0][0] <= now
+                                             or resolve_deadlines[0][1] not in resolving):
+                    _, future = resolve_deadlines.popleft()
+                    target = resolving.pop(future, None)
+                    if target is None:
+                        continue
+                    future.cancel()
+                    yield target[0], target[1], False
+        finally:
+            for sock in inflight:
+                sock.close()
+            for future in resolving:
+                future.cancel()
+            selector.close()
+    
+    @staticmethod
+    def _start_connect(addresses: list):
+        """
+        向解析出的第一个地址发起非阻塞连接
+        
+        Args:
+            addresses: getaddrinfo 的结果
+        
+        Returns:
+            连接进行中返回socket对象，已经得出结果时返回端口是否开放
+        """
+        try:
+            family, _, _, _, address = addresses[0]
+            sock = socket.socket(family, socket.SOCK_STREAM)
+        except Exception:
+            return False
+        
+        sock.setblocking(False)
+        try:
+            result = sock.connect_ex(address)
+        except Exception:
+            result = -1
+        
+        if result in _CONNECT_IN_PROGRESS:
+            return sock
+        
+        sock.close()
+        return result == 0
+
+
+class TwoPhaseScanner(OllamaScanner):
+    """两阶段扫描器：端口探测与HTTP验证流水线并行，验证阶段有独立的线程数限制"""
+    
+    # 端口探测进度回调的最小间隔（秒）
+    SWEEP_REPORT_INTERVAL = 0.1
+    
+    def __init__(self, sweeper: PortSweeper, timeout: int = 5, **kwargs):
+        """
+        初始化扫描器
+        
+        Args:
+            sweeper: 端口探测器
+            timeout: HTTP验证的读取超时时间（秒）
+            **kwargs: 传递给 OllamaScanner 的其他参数（queue_factor、reuse_connection等）
+        """
+        super().__init__(timeout=timeout, **kwargs)
+        self.sweeper = sweeper
+    
+    @serve_from_cache
+    def scan_batch(self, targets, threads: int = 10,
+                   callback: Optional[Callable] = None,
+                   stop_flag: Optional[Callable] = None, collect: bool = True,
+                   sweep_callback: Optional[Callable] = None) -> list:
+        """
+        批量扫描目标
+        
+        Args:
+            targets: 目标序列 [(host, port), ...]
+            threads: HTTP验证阶段的并发线程数（开启自适应并发时为验证阶段的初始并发数）
+            callback: 回调函数，每完成一个目标时调用 callback(result, current, total)
+            stop_flag: 停止标志函数，返回True时停止扫描
+            collect: 是否保存并返回全部结果；为False时结果只交给回调，返回空列表，内存占用与目标数无关
+            sweep_callback: 端口探测进度回调 sweep_callback(swept, total, open_count)
+        
+        Returns:
+            list: 扫描结果列表
+        """
+        results = []
+        total = len(targets)
+        current = 0
+        swept = 0
+        open_count = 0
+        last_report = 0.0
+        window = threads * self.queue_factor
+        
+        # 自适应并发只调整验证阶段，端口探测的并发数仍由 sweep_concurrency 决定
+        controller = self._new_controller(threads)
+        if controller is not None:
+            threads = controller.maximum
+        
+        if self.pool_maxsize < threads:
+            self._mount_adapter(threads)
+        
+        executor = ThreadPoolExecutor(max_workers=threads)
+        pending = {}
+        started = {}
+        
+        def report(result):
+            nonlocal current
+            if collect:
+                results.append(result)
+            current += 1
+            if callback:
+                callback(result, current, total)
+        
+        def drain(timeout):
+            # 处理已完成的验证任务
+            if not pending:
+                return
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                host, port = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = ScanResult(host, port, False, error=f"扫描异常: {str(e)}")
+                if controller is not None:
+                    latency = time.monotonic() - started.pop(future)
+                    controller.record(latency, self._timed_out(result, latency))
+                report(result)
+        
+        try:
+            for host, port, is_open in self.sweeper.sweep(targets, stop_flag):
+                swept += 1
+                if is_open:
+                    open_count += 1
+                    future = executor.submit(self._timed, self._verify_http, host, port)
+                    pending[future] = (host, port)
+                    if controller is not None:
+                        started[future] = time.monotonic()
+                else:
+                    report(ScanResult(host, port, False, error="端口未开放"))
+                
+                if sweep_callback and time.monotonic() - last_report >= self.SWEEP_REPORT_INTERVAL:
+                    last_report = time.monotonic()
+                    sweep_callback(swept, total, open_count)
+                
+                # 验证阶段积压时暂停端口探测
+                drain(0)
+                while len(pending) >= (window if controller is None else controller.limit):
+                    if stop_flag and stop_flag():
+                        return results
+                    drain(self.POLL_INTERVAL)
+            
+            if sweep_callback:
+                sweep_callback(swept, total, open_count)
+            
+            # 等待剩余的验证任务
+            while pending:
+                if stop_flag and stop_flag():
+                    break
+                drain(self.POLL_INTERVAL)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
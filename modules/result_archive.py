@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+扫描结果归档模块
+按列压缩存储扫描结果（.osr），用于长期保存历史扫描并快速重新加载和筛选
+
+文件格式:
+    文件头 MAGIC，之后为若干行组（每组最多 ROW_GROUP_SIZE 行），每个行组为
+    [4字节小端序组头长度][组头JSON][各列zlib压缩数据...]
+    组头记录行数、各列压缩后的字节数，以及版本、错误信息、模型名称的字典；
+    主机按 字节偏移量 + UTF-8拼接数据 存储，主机名中可以包含任意字符；
+    版本和错误信息按字典编码存储，模型列表以 偏移量 + 字典编码 的形式保存为列表列
+"""
+
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional
+
+from modules.exporter import ResultSink
+from modules.ollama_scanner import ScanResult
+
+
+MAGIC = b"OSRA1\n"
+# 每个行组的最大行数
+ROW_GROUP_SIZE = 65536
+# zlib压缩级别，兼顾写入速度和压缩率
+COMPRESS_LEVEL = 6
+
+# 可读取的列
+COLUMNS = ("host", "port", "vulnerable", "version", "models", "error", "created")
+# 行组中各数据块的存储顺序
+_BLOCKS = ("host_offsets", "host", "port", "vulnerable", "version", "error",
+           "model_offsets", "model_codes", "created")
+# 读取每一列需要的数据块
+_COLUMN_BLOCKS = {
+    "host": ("host_offsets", "host"), "port": ("port",), "vulnerable": ("vulnerable",),
+    "version": ("version",), "error": ("error",), "created": ("created",),
+    "models": ("model_offsets", "model_codes"),
+}
+_HEADER_SIZE = struct.Struct("<I")
+# 数值列统一按小端序存储
+_SWAP = sys.byteorder == "big"
+
+
+def _to_bytes(values: array) -> bytes:
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def _encode(dictionary: Dict, value) -> int:
+    """字典编码，返回值在字典中的编号"""
+    code = dictionary.get(value)
+    if code is None:
+        code = dictionary[value] = len(dictionary)
+    return code
+
+
+class ArchiveSink(ResultSink):
+    """归档格式增量导出，结果按行组缓存，每满一组压缩写入一次"""
+    
+    extension = ".osr"
+    
+    def _open(self):
+        self._file = open(self.file_path, 'wb')
+        self._file.write(MAGIC)
+        self._new_group()
+    
+    def _new_group(self):
+        self._rows = 0
+        self._hosts = []
+        self._ports = array('I')
+        self._vulnerable = bytearray()
+        self._versions = array('I')
+        self._errors = array('I')
+        self._model_offsets = array('I', [0])
+        self._model_codes = array('I')
+        self._created = array('d')
+        self._version_dict = {}
+        self._error_dict = {}
+        self._model_dict = {}
+    
+    def write(self, result):
+        """
+        写入一个结果，ScanResult 直接按列写入，不转换为字典
+        
+        Args:
+            result: ScanResult 或 to_dict() 格式的字典
+        """
+        if isinstance(result, dict):
+            super().write(result)
+            return
+        if self.vulnerable_only and not result.vulnerable:
+            return
+        
+        self._append(result.host, result.port, result.vulnerable, result.version,
+                     result.models, result.error, result.created)
+        self.count += 1
+    
+    def _write_row(self, row: dict):
+        """写入 to_dict() 格式的结果，模型列表按列表保存"""
+        models = row.get("models") or []
+        if isinstance(models, str):
+            models = models.split(", ")
+        timestamp = row.get("timestamp")
+        created = time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S")) if timestamp else 0.0
+        self._append(row.get("host", ""), int(row.get("port", 0)), bool(row.get("vulnerable", False)),
+                     row.get("version", ""), models, row.get("error", ""), created)
+    
+    def _append(self, host, port, vulnerable, version, models, error, created):
+        """把一行追加到当前行组的各列，满一组时写出"""
+        self._hosts.append(host)
+        self._ports.append(port)
+        self._vulnerable.append(1 if vulnerable else 0)
+        self._versions.append(_encode(self._version_dict, str(version)))
+        self._errors.append(_encode(self._error_dict, error))
+        model_dict = self._model_dict
+        self._model_codes.extend(_encode(model_dict, model) for model in models)
+        self._model_offsets.append(len(self._model_codes))
+        self._created.append(created)
+        
+        self._rows += 1
+        if self._rows >= ROW_GROUP_SIZE:
+            self._write_group()
+    
+    def _write_group(self):
+        """压缩并写出当前行组"""
+        if not self._rows:
+            return
+        
+        hosts = [host.encode('utf-8') for host in self._hosts]
+        raw = {
+            "host_offsets": _to_bytes(array('I', accumulate(map(len, hosts), initial=0))),
+            "host": b"".join(hosts),
+            "port": _to_bytes(self._ports),
+            "vulnerable": bytes(self._vulnerable),
+            "version": _to_bytes(self._versions),
+            "error": _to_bytes(self._errors),
+            "model_offsets": _to_bytes(self._model_offsets),
+            "model_codes": _to_bytes(self._model_codes),
+            "created": _to_bytes(self._created),
+        }
+        blocks = [zlib.compress(raw[name], COMPRESS_LEVEL) for name in _BLOCKS]
+        header = json.dumps({
+            "rows": self._rows,
+            "sizes": [len(block) for block in blocks],
+            "versions": list(self._version_dict),
+            "errors": list(self._error_dict),
+            "models": list(self._model_dict),
+        }, ensure_ascii=False).encode('utf-8')
+        
+        self._file.write(_HEADER_SIZE.pack(len(header)))
+        self._file.write(header)
+        for block in blocks:
+            self._file.write(block)
+        self._new_group()
+    
+    def flush(self):
+        self._file.flush()
+    
+    def close(self):
+        self._write_group()
+        self._file.close()
+
+
+class ResultArchive:
+    """归档读取器，按行组读取，只解压需要的列"""
+    
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 归档文件路径
+        """
+        self.file_path = file_path
+    
+    def _groups(self, blocks) -> Iterator[tuple]:
+        """
+        逐个读取行组
+        
+        Yields:
+            tuple: (组头, {数据块名: 解压后的数据})，不需要的数据块直接跳过
+        """
+        with open(self.file_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是有效的扫描结果归档: {self.file_path}")
+            
+            while True:
+                size = f.read(_HEADER_SIZE.size)
+                if not size:
+                    return
+                if len(size) < _HEADER_SIZE.size:
+                    raise ValueError(f"归档文件不完整: {self.file_path}")
+                header = json.loads(f.read(_HEADER_SIZE.unpack(size)[0]))
+                
+                data = {}
+                for name, length in zip(_BLOCKS, header["sizes"]):
+                    if name in blocks:
+                        data[name] = zlib.decompress(f.read(length))
+                    else:
+                        f.seek(length, 1)
+                yield header, data
+    
+    def __len__(self) -> int:
+        """总行数（只读取组头）"""
+        return sum(header["rows"] for header, _ in self._groups(()))
+    
+    @staticmethod
+    def _decode(name: str, header: Dict, data: Dict, rows: Optional[List[int]] = None) -> list:
+        """
+        把行组中的一列解码为列表
+        
+        Args:
+            rows: 只解码这些行，None表示全部行
+        """
+        if rows is None:
+            rows = range(header["rows"])
+            whole = True
+        else:
+            whole = False
+        
+        if name == "host":
+            # 按偏移量切分，只解码需要的行
+            text = data["host"]
+            offsets = _from_bytes('I', data["host_offsets"])
+            return [text[offsets[index]:offsets[index + 1]].decode('utf-8') for index in rows]
+        elif name == "port":
+            values = _from_bytes('I', data["port"]).tolist()
+        elif name == "vulnerable":
+            values = [bool(value) for value in data["vulnerable"]]
+        elif name == "created":
+            values = _from_bytes('d', data["created"]).tolist()
+        elif name in ("version", "error"):
+            dictionary = [sys.intern(value) for value in header[name + "s"]]
+            codes = _from_bytes('I', data[name])
+            return [dictionary[codes[index]] for index in rows]
+        else:
+            # 模型列表：按偏移量切分字典编码
+            names = header["models"]
+            offsets = _from_bytes('I', data["model_offsets"])
+            codes = _from_bytes('I', data["model_codes"])
+            return [[names[code] for code in codes[offsets[index]:offsets[index + 1]]]
+                    for index in rows]
+        
+        return values if whole else [values[index] for index in rows]
+    
+    def _select(self, header: Dict, data: Dict, vulnerable_only: bool,
+                model: Optional[str], version: Optional[str]) -> Optional[List[int]]:
+        """
+        按筛选条件计算行组中满足条件的行号
+        
+        Returns:
+            没有筛选条件时返回None（表示全部行），否则返回行号列表
+        """
+        if not (vulnerable_only or model or version):
+            return None
+        
+        rows = range(header["rows"])
+        if vulnerable_only:
+            flags = data["vulnerable"]
+            rows = [index for index in rows if flags[index]]
+        if version:
+            if version not in header["versions"]:
+                return []
+            code = header["versions"].index(version)
+            codes = _from_bytes('I', data["version"])
+            rows = [index for index in rows if codes[index] == code]
+        if model:
+            if model not in header["models"]:
+                return []
+            code = header["models"].index(model)
+            offsets = _from_bytes('I', data["model_offsets"])
+            codes = _from_bytes('I', data["model_codes"])
+            rows = [index for index in rows if code in codes[offsets[index]:offsets[index + 1]]]
+        return list(rows)
+    
+    def read_columns(self, columns=COLUMNS, vulnerable_only: bool = False,
+                     model: Optional[str] = None, version: Optional[str] = None) -> Dict[str, list]:
+        """
+        按列读取归档，不创建结果对象
+        
+        Args:
+            columns: 需要读取的列
+            vulnerable_only: 只读取未授权访问的行
+            model: 只读取包含该模型的行
+            version: 只读取该版本的行
+        
+        Returns:
+            Dict[str, list]: {列名: 值列表}
+        """
+        for name in columns:
+            if name not in COLUMNS:
+                raise ValueError(f"未知的列: {name}")
+        
+        blocks = {block for name in columns for block in _COLUMN_BLOCKS[name]}
+        if vulnerable_only:
+            blocks.add("vulnerable")
+        if version:
+            blocks.add("version")
+        if model:
+            blocks.update(("model_offsets", "model_codes"))
+        
+        output = {name: [] for name in columns}
+        for header, data in self._groups(blocks):
+            rows = self._select(header, data, vulnerable_only, model, version)
+            if rows == []:
+                continue
+            for name in columns:
+                output[name].extend(self._decode(name, header, data, rows))
+        return output
+    
+    def load_results(self, vulnerable_only: bool = False, model: Optional[str] = None,
+                     version: Optional[str] = None) -> Iterator[ScanResult]:
+        """
+        读取归档中的扫描结果
+        
+        Args:
+            vulnerable_only: 只读取未授权访问的结果
+            model: 只读取包含该模型的结果
+            version: 只读取该版本的结果
+        
+        Yields:
+            ScanResult: 扫描结果（保留原始扫描时间）
+        """
+        blocks = set(_BLOCKS)
+        for header, data in self._groups(blocks):
+            rows = self._select(header, data, vulnerable_only, model, version)
+            if rows == []:
+                continue
+            columns = [self._decode(name, header, data, rows) for name in COLUMNS]
+            for host, port, vulnerable, version_value, models, error, created in zip(*columns):
+                result = ScanResult(host, port, vulnerable, version=version_value,
+                                    models=models, error=error)
+                result.created = created
+                yield result
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+扫描结果缓存模块
+按 (host, port) 把扫描结果持久化到SQLite，按结果类型设置有效期，超出容量时淘汰最久未使用的结果；
+每天重复扫描同一批目标时，有效期内的目标直接返回缓存的结果，不再发起连接
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from modules.ollama_scanner import ScanResult
+
+
+# 结果类型: 发现未授权访问 / 端口未开放 / 其他（非Ollama服务、连接失败、超时等）
+OUTCOME_VULNERABLE = "vulnerable"
+OUTCOME_CLOSED = "closed"
+OUTCOME_OTHER = "other"
+
+
+def result_outcome(result: ScanResult) -> str:
+    """
+    判断扫描结果的类型，决定缓存有效期
+    
+    Args:
+        result: 扫描结果
+    
+    Returns:
+        str: OUTCOME_VULNERABLE、OUTCOME_CLOSED 或 OUTCOME_OTHER
+    """
+    if result.vulnerable:
+        return OUTCOME_VULNERABLE
+    if result.error == "端口未开放":
+        return OUTCOME_CLOSED
+    return OUTCOME_OTHER
+
+
+class ResultCache:
+    """
+    扫描结果缓存，写入和命中后的使用时间先放在内存缓冲区，按条数批量提交
+    
+    只应在调用扫描回调的线程中使用（scan_batch 中目标迭代和回调都在同一个线程）
+    """
+    
+    def __init__(self, path: str, ttls: Dict[str, float], max_entries: int = 1000000,
+                 batch_size: int = 1000):
+        """
+        打开（或创建）结果缓存
+        
+        Args:
+            path: 缓存文件路径
+            ttls: 各类结果的有效期（秒）{结果类型: 秒数}，未列出或不大于0的类型不缓存
+            max_entries: 最多缓存的目标数，超出时淘汰最久未使用的结果
+            batch_size: 缓冲区达到该条数时立即提交
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.path = path
+        self.ttls = ttls
+        self.max_entries = max(max_entries, 1)
+        self.batch_size = batch_size
+        self.hits = 0
+        self.lookups = 0
+        self._writes = []
+        self._touches = []
+        
+        # 扫描器在界面线程创建、在扫描线程使用，连接需要允许跨线程使用
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "host TEXT NOT NULL, port INTEGER NOT NULL, vulnerable INTEGER NOT NULL, "
+            "version TEXT, models TEXT, error TEXT, created REAL, expires REAL NOT NULL, "
+            "used REAL NOT NULL, UNIQUE (host, port))")
+        # 淘汰时按使用时间顺序删除
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self._conn.commit()
+    
+    @classmethod
+    def from_config(cls, scan_config: Dict) -> "ResultCache":
+        """
+        根据 scan 配置段打开缓存
+        
+        Args:
+            scan_config: config.yaml 中的 scan 配置段
+        
+        Returns:
+            ResultCache: 结果缓存
+        """
+        ttls = {
+            OUTCOME_VULNERABLE: scan_config.get("cache_ttl_vulnerable", 3600),
+            OUTCOME_CLOSED: scan_config.get("cache_ttl_closed", 86400),
+            OUTCOME_OTHER: scan_config.get("cache_ttl_other", 3600),
+        }
+        return cls(scan_config.get("cache_path", "./result/cache/scan_cache.db"), ttls,
+                   scan_config.get("cache_max_entries", 1000000))
+    
+    @property
+    def hit_ratio(self) -> float:
+        """命中率（0~1）"""
+        return self.hits / self.lookups if self.lookups else 0.0
+    
+    def get(self, host: str, port: int) -> Optional[ScanResult]:
+        """
+        查询有效期内的缓存结果
+        
+        Args:
+            host: 主机
+            port: 端口
+        
+        Returns:
+            Optional[ScanResult]: 缓存的结果（created 为原始扫描时间），未命中或已过期时返回None
+        """
+        self.lookups += 1
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT vulnerable, version, models, error, created FROM results "
+            "WHERE host = ? AND port = ? AND expires > ?", (host, port, now)).fetchone()
+        if row is None:
+            return None
+        
+        self.hits += 1
+        self._touches.append((now, host, port))
+        if len(self._touches) >= self.batch_size:
+            self.flush()
+        
+        vulnerable, version, models, error, created = row
+        result = ScanResult(host, port, bool(vulnerable), version=version or "",
+                            models=json.loads(models) if models else None, error=error or "")
+        result.created = created
+        return result
+    
+    def put(self, result: ScanResult):
+        """缓存一个扫描结果，该类结果的有效期不大于0时忽略"""
+        ttl = self.ttls.get(result_outcome(result), 0)
+        if not ttl or ttl < 0:
+            return
+        
+        now = time.time()
+        models = json.dumps(list(result.models), ensure_ascii=False) if result.models else ""
+        self._writes.append((result.host, result.port, int(result.vulnerable), result.version,
+                             models, result.error, result.created, now + ttl, now))
+        if len(self._writes) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """提交缓冲区中的结果和使用时间"""
+        if self._writes:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(host, port, vulnerable, version, models, error, created, expires, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._writes)
+            self._writes = []
+        if self._touches:
+            self._conn.executemany("UPDATE results SET used = ? WHERE host = ? AND port = ?",
+                                   self._touches)
+            self._touches = []
+        self._conn.commit()
+    
+    def evict(self):
+        """提交缓冲区，删除过期的结果，超出容量时按使用时间淘汰最久未使用的结果"""
+        self.flush()
+        self._conn.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+        excess = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute("DELETE FROM results WHERE rowid IN "
+                               "(SELECT rowid FROM results ORDER BY used LIMIT ?)", (excess,))
+        self._conn.commit()
+    
+    def to_dict(self) -> Dict:
+        """本次打开以来的命中统计"""
+        return {"hits": self.hits, "lookups": self.lookups, "hit_ratio": round(self.hit_ratio, 4)}
+    
+    def close(self):
+        """淘汰多余结果并关闭缓存"""
+        self.evict()
+        self._conn.close()
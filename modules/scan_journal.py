@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+扫描断点日志模块
+把已完成的目标和结果追加写入SQLite（WAL模式），扫描中断或程序崩溃后可跳过已完成的目标继续扫描
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, Set, Tuple
+
+from modules.data_parser import IPRangeTargets
+from modules.ollama_scanner import ScanResult
+from modules.target_index import TargetIndex
+
+
+class ScanJournal:
+    """扫描断点日志，结果先写入内存缓冲区，按条数或时间间隔批量提交"""
+    
+    def __init__(self, path: str, flush_interval: float = 1, batch_size: int = 1000):
+        """
+        打开（或创建）断点日志
+        
+        Args:
+            path: 日志文件路径
+            flush_interval: 两次提交之间的最长间隔（秒），程序崩溃时最多丢失这段时间内的结果
+            batch_size: 缓冲区达到该条数时立即提交
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        
+        # 扫描线程写入、界面线程读取，连接需要允许跨线程使用（由锁保证串行）
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL模式下提交只追加日志，synchronous=NORMAL 不在每次提交时fsync，进程崩溃不会丢失已提交数据
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "host TEXT NOT NULL, port INTEGER NOT NULL, vulnerable INTEGER NOT NULL, "
+            "version TEXT, models TEXT, error TEXT, created REAL, "
+            "PRIMARY KEY (host, port)) WITHOUT ROWID")
+        self._conn.commit()
+    
+    @staticmethod
+    def job_path(journal_dir: str, job: str) -> str:
+        """
+        根据扫描任务描述生成日志文件路径，同一任务（相同文件和范围、相同IP段和端口）对应同一个日志
+        
+        Args:
+            journal_dir: 日志目录
+            job: 任务描述字符串
+        
+        Returns:
+            str: 日志文件路径
+        """
+        digest = hashlib.sha1(job.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(journal_dir, f"scan_{digest}.db")
+    
+    def __len__(self) -> int:
+        """已记录的目标数（包含尚未提交的缓冲区）"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return count + len(self._pending)
+    
+    def record(self, result: ScanResult):
+        """记录一个已完成的目标"""
+        models = json.dumps(list(result.models), ensure_ascii=False) if result.models else ""
+        with self._lock:
+            self._pending.append((result.host, result.port, int(result.vulnerable),
+                                  result.version, models, result.error, result.created))
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+    
+    def flush(self):
+        """提交缓冲区中的结果"""
+        with self._lock:
+            self._flush()
+    
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               self._pending)
+        self._conn.commit()
+        self._pending = []
+    
+    def reset(self):
+        """清空日志，重新开始扫描时调用"""
+        with self._lock:
+            self._pending = []
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+    
+    def done_keys(self) -> Set[Tuple[str, int]]:
+        """
+        读取已完成目标的索引
+        
+        Returns:
+            Set[Tuple[str, int]]: {(host, port), ...}
+        """
+        with self._lock:
+            self._flush()
+            return set(self._conn.execute("SELECT host, port FROM results"))
+    
+    def load_results(self) -> Iterator[ScanResult]:
+        """
+        按扫描时间顺序读取已记录的结果
+        
+        Yields:
+            ScanResult: 扫描结果
+        """
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT host, port, vulnerable, version, models, error, created "
+                "FROM results ORDER BY created").fetchall()
+        
+        for host, port, vulnerable, version, models, error, created in rows:
+            result = ScanResult(host, port, bool(vulnerable), version=version or "",
+                                models=json.loads(models) if models else None, error=error or "")
+            result.created = created
+            yield result
+    
+    def close(self):
+        """提交剩余结果并关闭日志"""
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+class PendingTargets:
+    """从目标序列中排除已完成目标的视图，按需过滤，不复制目标列表"""
+    
+    def __init__(self, targets, done: Set[Tuple[str, int]]):
+        """
+        Args:
+            targets: 原始目标序列 [(host, port), ...]
+            done: 已完成目标的索引
+        """
+        self.targets = targets
+        self.done = done
+        # 预先统计剩余数量，供进度显示使用：IP段和去重后的目标能直接判断是否包含某个目标，
+        # 只需检查已完成的目标；其他序列逐个检查目标
+        if isinstance(targets, (IPRangeTargets, TargetIndex)):
+            self._len = len(targets) - sum(1 for target in done if target in targets)
+        else:
+            self._len = sum(1 for target in targets if target not in done)
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def __iter__(self):
+        done = self.done
+        for target in self.targets:
+            if target not in done:
+                yield target
+
+
+def pending_targets(targets, done: Set[Tuple[str, int]]):
+    """
+    排除已完成的目标
+    
+    Args:
+        targets: 原始目标序列
+        done: 已完成目标的索引
+    
+    Returns:
+        没有已完成目标时直接返回原序列，否则返回 PendingTargets
+    """
+    if not done:
+        return targets
+    return PendingTargets(targets, done)
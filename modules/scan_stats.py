@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+扫描统计模块
+每完成一个目标增量更新一次，GUI状态栏、命令行和导出共用
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from modules.latency_histogram import PhaseHistograms
+
+
+class ScanStats:
+    """扫描统计，所有计数均为O(1)增量更新"""
+    
+    def __init__(self, total: int = 0):
+        """
+        Args:
+            total: 目标总数
+        """
+        self.total = total
+        self.completed = 0
+        self.vulnerable = 0
+        self.errors = Counter()
+        self.versions = Counter()
+        # 各探测阶段的耗时分布
+        self.timings = PhaseHistograms()
+        self.start_time = time.time()
+        self.end_time = None
+        self._lock = threading.Lock()
+    
+    def add(self, result):
+        """记录一个扫描结果"""
+        with self._lock:
+            self.completed += 1
+            if result.vulnerable:
+                self.vulnerable += 1
+            if result.error:
+                self.errors[result.error] += 1
+            if result.version:
+                self.versions[result.version] += 1
+            if result.timings is not None:
+                self.timings.record(result.timings)
+    
+    def finish(self):
+        """标记扫描结束，固定耗时"""
+        self.end_time = time.time()
+    
+    @property
+    def elapsed(self) -> float:
+        """已耗时（秒）"""
+        return (self.end_time or time.time()) - self.start_time
+    
+    @property
+    def throughput(self) -> float:
+        """扫描速率（目标/秒）"""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+    
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        with self._lock:
+            return {
+                "total": self.total,
+                "completed": self.completed,
+                "vulnerable": self.vulnerable,
+                "errors": dict(self.errors.most_common()),
+                "versions": dict(self.versions.most_common()),
+                "elapsed": round(self.elapsed, 3),
+                "throughput": round(self.throughput, 1),
+                "timings": self.timings.to_dict(),
+            }
+    
+    def summary(self) -> str:
+        """一行文字摘要"""
+        text = (f"共扫描 {self.completed} 个目标，发现 {self.vulnerable} 个未授权访问，"
+                f"耗时 {self.elapsed:.1f} 秒（{self.throughput:.1f} 个/秒）")
+        if self.errors:
+            top_errors = "，".join(f"{error} {count}" for error, count in self.errors.most_common(3))
+            text += f"；主要错误: {top_errors}"
+        return text
+    
+    def timing_summary(self) -> str:
+        """各探测阶段耗时分位数的一行摘要，没有耗时记录时为空字符串"""
+        with self._lock:
+            return self.timings.summary()
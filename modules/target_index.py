@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+目标去重模块
+扫描前统一规范化解析出的目标并去重：IPv4目标打包为整数 (ip<<16|port) 存入 array 后批量去重排序，
+域名等其他目标放入哈希集合去重
+"""
+
+import re
+import socket
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Iterator, Optional, Sequence, Tuple
+
+
+# 标准点分十进制IPv4地址（不含前导零，能按 inet_ntoa 原样还原）
+_OCTET = r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+_IPV4 = re.compile(rf'{_OCTET}(?:\.{_OCTET}){{3}}')
+
+
+# 每行均为标准IPv4地址的多行文本
+_IPV4_LINES = re.compile(rf'{_IPV4.pattern}(?:\n{_IPV4.pattern})*', re.A)
+
+
+def normalize_target(host, port) -> Optional[Tuple[str, int]]:
+    """
+    规范化单个目标：去掉协议前缀和路径，主机中带端口时以主机中的为准，域名转为小写
+    
+    Args:
+        host: 主机（IP、域名或URL）
+        port: 端口
+    
+    Returns:
+        Optional[Tuple[str, int]]: (host, port)，主机为空时返回None
+    """
+    host = str(host).strip()
+    if host.startswith(('http://', 'https://')):
+        host = host.split('://', 1)[1]
+    host = host.split('/', 1)[0]
+    
+    # 只有一个冒号时为 主机:端口（多个冒号为IPv6地址，原样保留）
+    if host.count(':') == 1:
+        host, _, suffix = host.partition(':')
+        if suffix.isdigit():
+            port = int(suffix)
+    if not host:
+        return None
+    return (host.lower(), port)
+
+
+class TargetIndex:
+    """
+    去重后的目标序列，支持len()、迭代和下标/切片访问
+    
+    IPv4目标按打包后的整数排序保存（每个目标8字节），其余目标按首次出现的顺序保存在IPv4目标之后
+    """
+    
+    def __init__(self, keys: array, others: list, dropped: int = 0):
+        """
+        Args:
+            keys: 已排序去重的IPv4目标键 (ip<<16|port)
+            others: 已去重的其他目标 [(host, port), ...]
+            dropped: 去除的重复目标数
+        """
+        self.keys = keys
+        self.others = others
+        self.dropped = dropped
+        # 其他目标的集合，首次判断是否包含某个目标时创建
+        self._other_set = None
+    
+    @classmethod
+    def build(cls, targets: Sequence[Tuple[str, int]]) -> "TargetIndex":
+        """
+        规范化并去重目标
+        
+        先按原始 (host, port) 去掉完全相同的重复目标。主机全部为标准IPv4地址（解析器输出的常见情况）时
+        不逐行处理：地址和端口分别批量打包后交错写入同一个缓冲区得到 (ip<<16|port) 键，直接在 array 上排序；
+        否则逐个规范化
+        
+        Args:
+            targets: 目标序列 [(host, port), ...]，需要支持len()
+        
+        Returns:
+            TargetIndex: 去重后的目标，dropped 为去除的重复目标数（规范化后主机为空的目标不计入）
+        """
+        total = len(targets)
+        rows = list(dict.fromkeys(targets))
+        try:
+            # 所有主机拼成一段文本，一次正则匹配确认每行都是标准IPv4地址
+            hosts = list(map(itemgetter(0), rows))
+            text = "\n".join(hosts)
+            if text.count("\n") == len(rows) - 1 and _IPV4_LINES.fullmatch(text):
+                # 主机均为标准写法时不同的目标对应不同的键，只需排序
+                keys = cls._pack(b"".join(map(socket.inet_aton, hosts)),
+                                 array('H', map(itemgetter(1), rows)))
+                return cls(array('Q', sorted(keys)), [], total - len(keys))
+        except (TypeError, OverflowError):
+            # 主机不是字符串或端口不合法，逐个处理
+            pass
+        
+        keys = array('Q')
+        add_key = keys.append
+        others = {}
+        is_ipv4 = _IPV4.fullmatch
+        aton = socket.inet_aton
+        unpack = struct.Struct('!I').unpack
+        empty = 0
+        
+        for host, port in rows:
+            # 解析器输出的主机大多已经是干净的IPv4地址，直接打包
+            if type(host) is not str or not is_ipv4(host):
+                target = normalize_target(host, port)
+                if target is None:
+                    empty += 1
+                    continue
+                host, port = target
+                if not is_ipv4(host):
+                    # dict保留首次出现的顺序
+                    others.setdefault(target, None)
+                    continue
+            
+            # 只打包合法端口，其他端口（如超出范围的）作为普通目标保留
+            if type(port) is int and 0 <= port <= 0xFFFF:
+                add_key(unpack(aton(host))[0] << 16 | port)
+            else:
+                others.setdefault((host, port), None)
+        
+        # 批量去重排序
+        keys = array('Q', sorted(set(keys)))
+        others = list(others)
+        return cls(keys, others, total - empty - len(keys) - len(others))
+    
+    @staticmethod
+    def _pack(addresses: bytes, ports: array) -> array:
+        """
+        把地址（每个4字节，网络字节序）和端口交错写入缓冲区，得到 (ip<<16|port) 键
+        
+        Args:
+            addresses: 拼接在一起的 inet_aton 结果
+            ports: 端口 array('H')
+        
+        Returns:
+            array: array('Q') 键
+        """
+        count = len(ports)
+        if sys.byteorder == 'little':
+            ports.byteswap()
+        ports = ports.tobytes()
+        # 每个键8字节：2字节0、4字节地址、2字节端口，均为大端序
+        buffer = bytearray(8 * count)
+        for offset in range(4):
+            buffer[2 + offset::8] = addresses[offset::4]
+        buffer[6::8] = ports[0::2]
+        buffer[7::8] = ports[1::2]
+        keys = array('Q')
+        keys.frombytes(buffer)
+        if sys.byteorder == 'little':
+            keys.byteswap()
+        return keys
+    
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.others)
+    
+    def __contains__(self, target) -> bool:
+        # IPv4目标在有序的键中二分查找，不遍历目标
+        try:
+            host, port = target
+        except (TypeError, ValueError):
+            return False
+        if type(host) is str and _IPV4.fullmatch(host) and type(port) is int and 0 <= port <= 0xFFFF:
+            key = struct.unpack('!I', socket.inet_aton(host))[0] << 16 | port
+            keys = self.keys
+            index = bisect_left(keys, key)
+            return index < len(keys) and keys[index] == key
+        if self._other_set is None:
+            self._other_set = set(self.others)
+        return target in self._other_set
+    
+    @staticmethod
+    def _unpack_key(key: int) -> Tuple[str, int]:
+        return (socket.inet_ntoa(struct.pack('!I', key >> 16)), key & 0xFFFF)
+    
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        ntoa = socket.inet_ntoa
+        pack = struct.Struct('!I').pack
+        for key in self.keys:
+            yield (ntoa(pack(key >> 16)), key & 0xFFFF)
+        yield from self.others
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("目标切片不支持步长")
+            stop = max(stop, start)
+            count = len(self.keys)
+            return TargetIndex(self.keys[start:stop],
+                               self.others[max(start - count, 0):max(stop - count, 0)])
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("目标索引越界")
+        if index < len(self.keys):
+            return self._unpack_key(self.keys[index])
+        return self.others[index - len(self.keys)]
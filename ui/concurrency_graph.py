@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+并发曲线
+开启自适应并发时在扫描Tab中显示当前并发数，并按时间绘制并发数的变化
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class ConcurrencyGraph:
+    """自适应并发的实时曲线（阶梯折线，纵轴为并发数上下限）"""
+    
+    HEIGHT = 60
+    PADDING = 4
+    
+    def __init__(self, parent):
+        """
+        Args:
+            parent: 父容器
+        """
+        self.frame = ttk.Frame(parent)
+        self.frame.pack(fill=tk.X, padx=5, pady=2)
+        self.label = ttk.Label(self.frame, text="自适应并发: 就绪")
+        self.label.pack(fill=tk.X)
+        self.canvas = tk.Canvas(self.frame, height=self.HEIGHT, background="white",
+                                highlightthickness=1, highlightbackground="#cccccc")
+        self.canvas.pack(fill=tk.X)
+    
+    def reset(self):
+        """开始新的扫描"""
+        self.canvas.delete("all")
+        self.label.config(text="自适应并发: 准备中...")
+    
+    def update(self, controller):
+        """
+        按并发控制器的当前状态刷新
+        
+        Args:
+            controller: AdaptiveConcurrency
+        """
+        history = controller.history_snapshot()
+        elapsed = controller.elapsed
+        phase = "慢启动" if controller.slow_start else "拥塞避免"
+        self.label.config(text=f"自适应并发: {controller.limit}（{controller.minimum}-{controller.maximum}，"
+                               f"{phase}，已减小 {controller.decreases} 次）")
+        
+        width = self.canvas.winfo_width()
+        if width <= 1:
+            return
+        
+        # 横轴覆盖变化记录中最早的时间到现在，纵轴为并发数下限到上限
+        start = history[0][0]
+        span = max(elapsed - start, 1e-3)
+        low = controller.minimum
+        high = max(controller.maximum, low + 1)
+        pad = self.PADDING
+        
+        def x(t):
+            return pad + (t - start) / span * (width - 2 * pad)
+        
+        def y(limit):
+            return self.HEIGHT - pad - (limit - low) / (high - low) * (self.HEIGHT - 2 * pad)
+        
+        points = []
+        for index, (t, limit) in enumerate(history):
+            if index:
+                points.extend((x(t), y(history[index - 1][1])))
+            points.extend((x(t), y(limit)))
+        points.extend((x(elapsed), y(history[-1][1])))
+        
+        self.canvas.delete("all")
+        self.canvas.create_line(*points, fill="#1f77b4", width=2)
+        self.canvas.create_text(width - pad, pad, anchor=tk.NE, text=str(controller.maximum),
+                                fill="#888888", font=("TkDefaultFont", 8))
+        self.canvas.create_text(width - pad, self.HEIGHT - pad, anchor=tk.SE, text=str(low),
+                                fill="#888888", font=("TkDefaultFont", 8))
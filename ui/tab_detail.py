@@ -7,7 +7,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
 import json
-from modules.ollama_scanner import OllamaScanner
+from modules.ollama_scanner import create_scanner
 
 
 class DetailTab:
@@ -21,6 +21,9 @@ class DetailTab:
         self.config = config
         self.on_close_callback = on_close_callback
         
+        # 整个详情页共用一个扫描器，连续执行命令时复用连接池中的连接（只执行命令，不需要结果缓存）
+        self.scanner = create_scanner(dict(config.get("scan", {}), cache_enabled=False))
+        
         # 创建Tab
         self.frame = ttk.Frame(notebook)
         self.tab_id = notebook.add(self.frame, text=f"📋 {host}:{port}")
@@ -100,9 +103,7 @@ class DetailTab:
     def load_basic_info(self):
         """加载基本信息"""
         def run():
-            timeout = self.config.get("scan", {}).get("timeout", 5)
-            scanner = OllamaScanner(timeout=timeout)
-            result = scanner.scan_single(self.host, self.port)
+            result = self.scanner.scan_single(self.host, self.port)
             
             self.frame.after(0, lambda: self.show_basic_info(result))
         
@@ -182,9 +183,7 @@ class DetailTab:
         self.output_text.see(tk.END)
         
         def run():
-            timeout = self.config.get("scan", {}).get("timeout", 30 if command == "pull" else 5)
-            scanner = OllamaScanner(timeout=timeout)
-            result = scanner.execute_command(self.host, self.port, command, model_name)
+            result = self.scanner.execute_command(self.host, self.port, command, model_name)
             
             self.frame.after(0, lambda: self.show_command_result(command, result))
         
@@ -207,6 +206,10 @@ class DetailTab:
         else:
             self.output_text.insert(tk.END, f"错误: {result.get('error')}\n", "error")
         
+        stats = self.scanner.pool_stats()
+        self.output_text.insert(tk.END, f"连接池: 请求 {stats['requests']} 次, 新建连接 {stats['new_connections']} 个, "
+                                        f"复用连接 {stats['reused']} 次\n", "info")
+        
         self.output_text.insert(tk.END, "\n")
         self.output_text.see(tk.END)
     
@@ -286,9 +289,7 @@ class DetailTab:
         self.output_text.insert(tk.END, "正在获取模型列表...\n", "info")
         
         def get_models():
-            timeout = self.config.get("scan", {}).get("timeout", 5)
-            scanner = OllamaScanner(timeout=timeout)
-            result = scanner.execute_command(self.host, self.port, "list")
+            result = self.scanner.execute_command(self.host, self.port, "list")
             
             self.frame.after(0, lambda: self.show_chat_dialog(result))
         
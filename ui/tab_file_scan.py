@@ -3,9 +3,27 @@
 功能一：文件导入扫描Tab
 """
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from modules.data_parser import DataParser
+from ui.virtual_tree import VirtualResultTree
+from ui.concurrency_graph import ConcurrencyGraph
+
+
+# 解析线程每解析出这么多个目标提交一批给界面
+PARSE_BATCH = 1000
+# 预览窗口最多显示的目标数
+PREVIEW_ROWS = 100
+
+
+class _ParseCancelled(Exception):
+    """解析被取消"""
+
+
+# 解析线程结束标记
+_PARSE_DONE = object()
 
 
 class FileScanTab:
@@ -18,6 +36,10 @@ class FileScanTab:
         self.clear_results_callback = clear_results_callback
         self.export_results_callback = export_results_callback
         self.parsed_targets = []
+        # 正在进行的解析的取消标志，没有解析时为None
+        self.parse_cancel = None
+        self.refresh_interval = max(int(1000 / config.get("gui", {}).get("refresh_hz", 10)), 1)
+        self.preview_window = None
         
         self.create_ui()
     
@@ -36,6 +58,9 @@ class FileScanTab:
             row=0, column=2, padx=5)
         ttk.Button(control_frame, text="解析文件", command=self.parse_file).grid(
             row=0, column=3, padx=5)
+        self.cancel_parse_btn = ttk.Button(control_frame, text="取消解析", command=self.cancel_parse,
+                                           state=tk.DISABLED)
+        self.cancel_parse_btn.grid(row=0, column=4, padx=5)
         
         # 扫描设置
         ttk.Label(control_frame, text="线程数:").grid(row=1, column=0, sticky=tk.W, padx=5)
@@ -52,15 +77,25 @@ class FileScanTab:
         ttk.Label(range_frame, text="-").pack(side=tk.LEFT, padx=2)
         ttk.Entry(range_frame, textvariable=self.end_index_var, width=8).pack(side=tk.LEFT)
         
+        # 解析进度（按已读取的字节数）
+        self.parse_progress = ttk.Progressbar(control_frame, mode='determinate', maximum=100)
+        self.parse_progress.grid(row=2, column=0, columnspan=5, sticky=tk.EW, padx=5, pady=(5, 0))
+        # 解析状态单独显示，边解析边扫描时不覆盖扫描进度
+        self.parse_label = ttk.Label(control_frame, text="")
+        self.parse_label.grid(row=3, column=0, columnspan=5, sticky=tk.W, padx=5)
+        
         # 按钮
         button_frame = ttk.Frame(control_frame)
-        button_frame.grid(row=2, column=0, columnspan=5, pady=10)
+        button_frame.grid(row=4, column=0, columnspan=5, pady=10)
         self.scan_btn = ttk.Button(button_frame, text="开始扫描", 
                                    command=lambda: self.start_scan_callback(1))
         self.scan_btn.pack(side=tk.LEFT, padx=5)
         self.stop_btn = ttk.Button(button_frame, text="停止扫描", 
                                    command=None, state=tk.DISABLED)  # 回调将在主GUI中设置
         self.stop_btn.pack(side=tk.LEFT, padx=5)
+        self.resume_btn = ttk.Button(button_frame, text="继续扫描", 
+                                     command=lambda: self.start_scan_callback(1, resume=True))
+        self.resume_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="清空结果", 
                   command=lambda: self.clear_results_callback(1)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="导出结果", 
@@ -72,6 +107,20 @@ class FileScanTab:
         self.status_label = ttk.Label(self.parent, text="就绪")
         self.status_label.pack(fill=tk.X, padx=5)
         
+        # 两阶段扫描时单独显示端口探测进度
+        self.sweep_progress = None
+        self.sweep_label = None
+        if self.config.get("scan", {}).get("engine") == "two_phase":
+            self.sweep_progress = ttk.Progressbar(self.parent, mode='determinate')
+            self.sweep_progress.pack(fill=tk.X, padx=5, pady=2)
+            self.sweep_label = ttk.Label(self.parent, text="端口探测: 就绪")
+            self.sweep_label.pack(fill=tk.X, padx=5)
+        
+        # 自适应并发时显示并发数变化曲线
+        self.concurrency_graph = None
+        if self.config.get("scan", {}).get("adaptive_concurrency", False):
+            self.concurrency_graph = ConcurrencyGraph(self.parent)
+        
         # 结果表格
         self.create_result_tree()
     
@@ -80,73 +129,161 @@ class FileScanTab:
         result_frame = ttk.LabelFrame(self.parent, text="扫描结果（双击查看详情）", padding=5)
         result_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        columns = ("host", "port", "status", "version", "models", "error", "time")
-        self.tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=15)
-        
-        self.tree.heading("host", text="主机")
-        self.tree.heading("port", text="端口")
-        self.tree.heading("status", text="状态")
-        self.tree.heading("version", text="版本")
-        self.tree.heading("models", text="模型")
-        self.tree.heading("error", text="错误信息")
-        self.tree.heading("time", text="时间")
-        
-        self.tree.column("host", width=150)
-        self.tree.column("port", width=60)
-        self.tree.column("status", width=100)
-        self.tree.column("version", width=100)
-        self.tree.column("models", width=200)
-        self.tree.column("error", width=150)
-        self.tree.column("time", width=150)
-        
-        scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.result_view = VirtualResultTree(result_frame)
+        self.tree = self.result_view.tree
     
     def select_file(self):
         """选择文件"""
         filetypes = (
-            ("所有支持的文件", "*.csv *.json"),
+            ("所有支持的文件", "*.csv *.json *.jsonl"),
             ("CSV文件", "*.csv"),
             ("JSON文件", "*.json"),
+            ("JSONL文件", "*.jsonl"),
         )
         filename = filedialog.askopenfilename(title="选择文件", filetypes=filetypes)
         if filename:
             self.file_path_var.set(filename)
     
+    @property
+    def parsing(self) -> bool:
+        """是否正在解析文件"""
+        return self.parse_cancel is not None
+    
     def parse_file(self):
-        """解析文件并显示预览"""
+        """在后台线程中解析文件，解析出的目标分批显示在预览窗口中，已解析的部分可以直接扫描"""
         file_path = self.file_path_var.get()
         if not file_path:
             messagebox.showwarning("警告", "请先选择文件")
             return
         
+        # 重新解析时取消上一次未完成的解析
+        if self.parse_cancel is not None:
+            self.parse_cancel.set()
+        
+        cancel = threading.Event()
+        parse_state = []
+        
+        def progress(done, total):
+            parse_state[:] = [done, total]
+            if cancel.is_set():
+                raise _ParseCancelled()
+        
         try:
-            targets = DataParser.parse_file(file_path)
-            self.parsed_targets = targets
-            self.end_index_var.set(len(targets))
+            iterator = DataParser.iter_file(file_path, progress)
+        except ValueError as e:
+            messagebox.showerror("错误", f"解析文件失败: {str(e)}")
+            return
+        
+        # 目标列表只由界面线程追加，扫描时可直接读取已解析的部分
+        targets = []
+        self.parsed_targets = targets
+        self.parse_cancel = cancel
+        self.end_index_var.set(0)
+        self.parse_progress['value'] = 0
+        self.cancel_parse_btn.config(state=tk.NORMAL)
+        self.parse_label.config(text="正在解析文件...")
+        self.show_preview(targets, file_path)
+        
+        batches = queue.Queue()
+        
+        def parse_thread():
+            batch = []
+            try:
+                for target in iterator:
+                    batch.append(target)
+                    if len(batch) >= PARSE_BATCH:
+                        batches.put(batch)
+                        batch = []
+                        if cancel.is_set():
+                            raise _ParseCancelled()
+                batches.put(batch)
+                batches.put(_PARSE_DONE)
+            except Exception as e:
+                batches.put(batch)
+                batches.put(e)
+        
+        def drain():
+            # 已被新的解析替换
+            if self.parse_cancel is not cancel:
+                return
             
-            # 显示预览窗口
-            self.show_preview(targets, file_path)
+            outcome = None
+            try:
+                while outcome is None:
+                    item = batches.get_nowait()
+                    if isinstance(item, list):
+                        targets.extend(item)
+                    else:
+                        outcome = item
+            except queue.Empty:
+                pass
             
-        except Exception as e:
-            messagebox.showerror("错误", f"解析文件失败: {str(e)}")
+            if parse_state:
+                done, total = parse_state
+                self.parse_progress['value'] = done * 100 // max(total, 1)
+            
+            if outcome is None:
+                self.parse_label.config(text=f"正在解析文件: {int(self.parse_progress['value'])}% "
+                                             f"- 已解析 {len(targets)} 个目标（可直接扫描已解析的部分）")
+                self.update_preview(targets, finished=False)
+                self.parent.after(self.refresh_interval, drain)
+            else:
+                self.parse_finished(targets, outcome)
+        
+        threading.Thread(target=parse_thread, daemon=True).start()
+        self.parent.after(self.refresh_interval, drain)
+    
+    def cancel_parse(self):
+        """取消正在进行的解析，保留已解析的目标"""
+        if self.parse_cancel is not None:
+            self.parse_cancel.set()
+    
+    def parse_finished(self, targets, outcome):
+        """
+        解析结束
+        
+        Args:
+            targets: 已解析的目标
+            outcome: _PARSE_DONE、_ParseCancelled 或解析时抛出的异常
+        """
+        self.parse_cancel = None
+        self.cancel_parse_btn.config(state=tk.DISABLED)
+        self.end_index_var.set(len(targets))
+        self.update_preview(targets, finished=True)
+        
+        if outcome is _PARSE_DONE:
+            self.parse_progress['value'] = 100
+            self.parse_label.config(text=f"解析完成，共 {len(targets)} 个目标")
+        elif isinstance(outcome, _ParseCancelled):
+            self.parse_label.config(text=f"已取消解析，已解析 {len(targets)} 个目标")
+        else:
+            self.parse_label.config(text=f"解析文件失败，已解析 {len(targets)} 个目标")
+            messagebox.showerror("错误", f"解析文件失败: {str(outcome)}")
     
     def show_preview(self, targets, file_path):
-        """显示解析预览窗口"""
+        """
+        显示解析预览窗口，解析过程中由 update_preview 逐批填充
+        
+        Args:
+            targets: 目标列表（解析过程中持续增长）
+            file_path: 文件路径
+        """
+        if self.preview_window is not None and self.preview_window.winfo_exists():
+            self.preview_window.destroy()
+        
         preview_window = tk.Toplevel(self.parent)
         preview_window.title(f"解析预览 - {file_path.split('/')[-1]}")
         preview_window.geometry("700x500")
+        self.preview_window = preview_window
         
         # 顶部信息
         info_frame = ttk.Frame(preview_window, padding=10)
         info_frame.pack(fill=tk.X)
         
         ttk.Label(info_frame, text=f"文件: {file_path}", font=("", 10)).pack(anchor=tk.W)
-        ttk.Label(info_frame, text=f"解析结果: 共 {len(targets)} 个目标", 
-                 font=("", 10, "bold"), foreground="green").pack(anchor=tk.W, pady=5)
+        self.preview_label = ttk.Label(info_frame, text="正在解析...", 
+                                       font=("", 10, "bold"), foreground="green")
+        self.preview_label.pack(anchor=tk.W, pady=5)
         
         # 预览表格
         table_frame = ttk.Frame(preview_window)
@@ -154,6 +291,7 @@ class FileScanTab:
         
         columns = ("index", "host", "port")
         tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
+        self.preview_tree = tree
         
         tree.heading("index", text="序号")
         tree.heading("host", text="主机/IP")
@@ -169,13 +307,6 @@ class FileScanTab:
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # 填充数据（最多显示前100条）
-        for idx, (host, port) in enumerate(targets[:100], 1):
-            tree.insert("", tk.END, values=(idx, host, port))
-        
-        if len(targets) > 100:
-            tree.insert("", tk.END, values=("...", f"还有 {len(targets)-100} 条数据", "..."))
-        
         # 按钮
         btn_frame = ttk.Frame(preview_window, padding=10)
         btn_frame.pack(fill=tk.X)
@@ -183,6 +314,32 @@ class FileScanTab:
         ttk.Button(btn_frame, text="确定", command=preview_window.destroy).pack(side=tk.RIGHT, padx=5)
         ttk.Button(btn_frame, text="复制到剪贴板", 
                   command=lambda: self.copy_to_clipboard(targets)).pack(side=tk.RIGHT, padx=5)
+        
+        self.update_preview(targets, finished=False)
+    
+    def update_preview(self, targets, finished: bool):
+        """
+        把新解析出的目标补充到预览窗口（最多显示前 PREVIEW_ROWS 条）
+        
+        Args:
+            targets: 已解析的目标
+            finished: 解析是否已结束
+        """
+        if self.preview_window is None or not self.preview_window.winfo_exists():
+            return
+        
+        tree = self.preview_tree
+        shown = len(tree.get_children())
+        for idx in range(shown, min(len(targets), PREVIEW_ROWS)):
+            host, port = targets[idx]
+            tree.insert("", tk.END, values=(idx + 1, host, port))
+        
+        if finished:
+            self.preview_label.config(text=f"解析结果: 共 {len(targets)} 个目标")
+            if len(targets) > PREVIEW_ROWS:
+                tree.insert("", tk.END, values=("...", f"还有 {len(targets)-PREVIEW_ROWS} 条数据", "..."))
+        else:
+            self.preview_label.config(text=f"正在解析: 已解析 {len(targets)} 个目标")
     
     def copy_to_clipboard(self, targets):
         """复制目标列表到剪贴板"""
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+虚拟结果表格
+结果保存在后台列表中，Treeview只保留可见窗口内的若干行，滚动时复用这些行刷新内容
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualResultTree:
+    """虚拟化的扫描结果表格，支持百万级结果的滚动、排序和过滤"""
+    
+    COLUMNS = ("host", "port", "status", "version", "models", "error", "time")
+    HEADINGS = {"host": "主机", "port": "端口", "status": "状态", "version": "版本",
+                "models": "模型", "error": "错误信息", "time": "时间"}
+    WIDTHS = {"host": 150, "port": 60, "status": 100, "version": 100,
+              "models": 200, "error": 150, "time": 150}
+    
+    # 各列的排序键
+    SORT_KEYS = {
+        "host": lambda r: r.host,
+        "port": lambda r: r.port,
+        "status": lambda r: r.vulnerable,
+        "version": lambda r: r.version,
+        "models": lambda r: len(r.models),
+        "error": lambda r: r.error,
+        "time": lambda r: r.created,
+    }
+    
+    def __init__(self, parent):
+        """
+        Args:
+            parent: 父容器
+        """
+        self.results = []
+        # 视图为结果下标列表，未过滤也未排序时为None（直接按结果顺序显示，不占额外内存）
+        self.view = None
+        self.offset = 0
+        self.rows = 15
+        self.filter_text = ""
+        self.vulnerable_only = False
+        self.sort_column = None
+        self.sort_reverse = False
+        
+        # 过滤栏
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="过滤:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        entry = ttk.Entry(filter_frame, textvariable=self.filter_var, width=30)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda e: self.apply_filter())
+        self.vulnerable_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="仅未授权", variable=self.vulnerable_only_var,
+                        command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="应用", command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.RIGHT)
+        
+        # 表格
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.tree = ttk.Treeview(table_frame, columns=self.COLUMNS, show="headings", height=self.rows)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=self.HEADINGS[column],
+                              command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=self.WIDTHS[column])
+        self.tree.tag_configure('vulnerable', background='#90EE90')
+        
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        
+        self.refresh()
+    
+    @staticmethod
+    def row_values(result) -> tuple:
+        """把扫描结果转换为表格行"""
+        status = "✅ 未授权访问" if result.vulnerable else "❌ 无法访问"
+        models_str = ", ".join(result.models[:3]) if result.models else ""
+        if len(result.models) > 3:
+            models_str += f" (+{len(result.models)-3})"
+        
+        return (result.host, result.port, status, result.version, models_str, result.error, result.timestamp)
+    
+    def clear(self):
+        """清空结果（保留过滤和排序设置）"""
+        self.results = []
+        self.view = [] if self._view_active() else None
+        self.offset = 0
+        self.refresh()
+    
+    def append(self, results: list):
+        """追加一批结果，并在当前停留在底部时自动跟随到最新结果"""
+        follow = self.offset + self.rows >= self._view_len()
+        
+        start = len(self.results)
+        self.results.extend(results)
+        # 排序状态下新结果先追加在末尾，再次点击列头时重新排序
+        if self.view is not None:
+            self.view.extend(index for index in range(start, len(self.results))
+                             if self._match(self.results[index]))
+        
+        if follow:
+            self.offset = max(self._view_len() - self.rows, 0)
+        self.refresh()
+    
+    def _view_active(self) -> bool:
+        """是否设置了过滤或排序"""
+        return bool(self.filter_text or self.vulnerable_only or self.sort_column)
+    
+    def _view_len(self) -> int:
+        return len(self.results) if self.view is None else len(self.view)
+    
+    def _match(self, result) -> bool:
+        """判断结果是否满足当前过滤条件"""
+        if self.vulnerable_only and not result.vulnerable:
+            return False
+        if self.filter_text:
+            text = self.filter_text
+            return (text in result.host or text in str(result.version) or text in result.error
+                    or any(text in model for model in result.models))
+        return True
+    
+    def apply_filter(self):
+        """按过滤栏条件重建视图"""
+        self.filter_text = self.filter_var.get().strip()
+        self.vulnerable_only = self.vulnerable_only_var.get()
+        if self._view_active():
+            self.view = [index for index, result in enumerate(self.results) if self._match(result)]
+            if self.sort_column:
+                self._sort_view()
+        else:
+            self.view = None
+        self.offset = 0
+        self.refresh()
+    
+    def sort_by(self, column: str):
+        """按列排序，重复点击同一列切换升降序"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        
+        if self.view is None:
+            self.view = list(range(len(self.results)))
+        self._sort_view()
+        self.offset = 0
+        self.refresh()
+    
+    def _sort_view(self):
+        key = self.SORT_KEYS[self.sort_column]
+        results = self.results
+        self.view.sort(key=lambda index: key(results[index]), reverse=self.sort_reverse)
+    
+    def scroll(self, delta: int):
+        """按行滚动"""
+        self.offset = min(max(self.offset + delta, 0), max(self._view_len() - self.rows, 0))
+        self.refresh()
+    
+    def on_scrollbar(self, action, value, unit=None):
+        """滚动条回调"""
+        if action == "moveto":
+            self.offset = int(float(value) * self._view_len())
+            self.scroll(0)
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self.scroll(int(value) * step)
+    
+    def on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+    
+    def on_resize(self, event):
+        """窗口大小变化时重新计算可见行数"""
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 25)
+        # 扣除表头高度
+        rows = max((event.height - rowheight) // rowheight, 1)
+        if rows != self.rows:
+            self.rows = rows
+            self.scroll(0)
+    
+    def refresh(self):
+        """只把可见窗口内的结果写入Treeview"""
+        if self.view is None:
+            window = range(self.offset, min(self.offset + self.rows, len(self.results)))
+        else:
+            window = self.view[self.offset:self.offset + self.rows]
+        items = self.tree.get_children()
+        
+        # 复用已有的行，不足时补充，多余时删除
+        for position, index in enumerate(window):
+            result = self.results[index]
+            tags = ('vulnerable',) if result.vulnerable else ()
+            if position < len(items):
+                self.tree.item(items[position], values=self.row_values(result), tags=tags)
+            else:
+                self.tree.insert("", tk.END, values=self.row_values(result), tags=tags)
+        if len(items) > len(window):
+            self.tree.delete(*items[len(window):])
+        
+        total = self._view_len()
+        if total:
+            self.scrollbar.set(self.offset / total, min((self.offset + self.rows) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_label.config(text=f"显示 {total} / {len(self.results)} 条")